@@ -1,192 +1,18 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
 import plotly.graph_objects as go
 
-# TAX CALCULATION FUNCTIONS (Final Corrected Version with Marginal Relief)
-
-def calculate_total_income(regime, salary, business_income, house_income, other_sources, house_loan_interest=0):
-    # Salary – Apply standard deduction
-    if regime == 'new':
-        salary -= 75000
-    else:
-        salary -= 50000
-    # House Property – Apply 30% standard deduction THEN subtract loan interest
-    house_income *= 0.70
-    house_income -= house_loan_interest  # Deduct interest on house property loan
-    # Total income excluding capital gains
-    total = max(0, salary) + max(0, business_income) + max(0, house_income) + max(0, other_sources)
-    return total
-
-def calculate_surcharge_rate(total_income, regime, capital_gains_income):
-    """Determine surcharge rate based on total income & regime, with CG max 15%"""
-    rate = 0
-    if total_income > 50000000:  # > 5 cr
-        rate = 0.37 if regime == "old" else 0.25
-    elif total_income > 20000000:  # 2–5 cr
-        rate = 0.25
-    elif total_income > 10000000:  # 1–2 cr
-        rate = 0.15
-    elif total_income > 5000000:   # 50L–1cr
-        rate = 0.10
-    # Capital gains surcharge cap at 15%
-    if capital_gains_income > 0 and rate > 0.15:
-        rate = 0.15
-    return rate
-
-def calculate_tax_old_regime(total_income, stcg, ltcg):
-    # Base tax (normal income)
-    tax = 0
-    if total_income <= 250000:
-        tax = 0
-    elif total_income <= 500000:
-        tax = (total_income - 250000) * 0.05
-    elif total_income <= 1000000:
-        tax = 12500 + (total_income - 500000) * 0.2
-    else:
-        tax = 112500 + (total_income - 1000000) * 0.3
-    
-    # Capital gains tax (separate calculation)
-    cg_tax = stcg * 0.20
-    if ltcg > 125000:
-        cg_tax += (ltcg - 125000) * 0.125
-    
-    # Apply rebate ONLY to regular income tax (NOT capital gains)
-    rebate_applied = 0
-    if total_income <= 500000:  # ₹5L limit
-        rebate_applied = min(12500, tax)  # Max ₹12.5K rebate on regular tax only
-        tax_after_rebate = max(0, tax - rebate_applied)
-    else:
-        tax_after_rebate = tax
-    
-    # Total tax = Regular tax (after rebate) + Capital gains tax (no rebate)
-    total_tax_before_surcharge = tax_after_rebate + cg_tax
-    
-    # Surcharge
-    surcharge_rate = calculate_surcharge_rate(total_income + stcg + ltcg, "old", stcg + ltcg)
-    surcharge = total_tax_before_surcharge * surcharge_rate
-    
-    # Cess
-    cess = (total_tax_before_surcharge + surcharge) * 0.04
-    
-    return round(max(total_tax_before_surcharge, 0), 2), round(surcharge, 2), round(cess, 2), round(rebate_applied, 2), 0
-
-def calculate_tax_new_regime(total_income, stcg, ltcg):
-    # NEW REGIME TAX SLABS FOR FY 2024-25
-    slabs = [
-        (400000, 0.00),    # 0 to 4L: 0%
-        (400000, 0.05),    # 4L to 8L: 5%
-        (400000, 0.10),    # 8L to 12L: 10%
-        (400000, 0.15),    # 12L to 16L: 15%
-        (400000, 0.20),    # 16L to 20L: 20%
-        (400000, 0.25),    # 20L to 24L: 25%
-        (float('inf'), 0.30)  # Above 24L: 30%
-    ]
-    
-    # Step 1: Apply LTCG exemption of ₹1.25L first
-    exempt_ltcg = min(ltcg, 125000)
-    taxable_ltcg_after_exemption = max(0, ltcg - exempt_ltcg)
-    
-    # Step 2: Calculate available basic exemption (₹4,00,000 for new regime)
-    basic_exemption_limit = 400000
-    
-    # Step 3: Apply basic exemption in priority order
-    # Priority: 1. Other income, 2. STCG, 3. Taxable LTCG
-    remaining_exemption = basic_exemption_limit
-    
-    # Use exemption for other income first
-    other_income_exempted = min(total_income, remaining_exemption)
-    remaining_exemption = max(0, remaining_exemption - other_income_exempted)
-    taxable_other_income = max(0, total_income - other_income_exempted)
-    
-    # Use remaining exemption for STCG
-    stcg_exempted = min(stcg, remaining_exemption)
-    remaining_exemption = max(0, remaining_exemption - stcg_exempted)
-    taxable_stcg = max(0, stcg - stcg_exempted)
-    
-    # Use remaining exemption for taxable LTCG
-    ltcg_exempted = min(taxable_ltcg_after_exemption, remaining_exemption)
-    final_taxable_ltcg = max(0, taxable_ltcg_after_exemption - ltcg_exempted)
-    
-    # Step 4: Calculate tax on REGULAR income starting from appropriate slab
-    regular_tax = 0
-    
-    if taxable_other_income > 0:
-        exemption_used_from_regular = other_income_exempted
-        
-        if exemption_used_from_regular >= 400000:
-            # Full ₹4L exemption used from regular income
-            # Start from ₹4L-8L slab (index 1)
-            income_remaining = taxable_other_income
-            
-            # Apply slabs starting from 4L-8L (5%)
-            for i in range(1, len(slabs)):  # Start from index 1 (₹4L-8L slab)
-                slab_limit, rate = slabs[i]
-                
-                if income_remaining <= 0:
-                    break
-                
-                taxable_in_slab = min(income_remaining, slab_limit)
-                regular_tax += taxable_in_slab * rate
-                income_remaining -= taxable_in_slab
-        else:
-            # Partial exemption used from regular income
-            remaining_in_first_slab = 400000 - exemption_used_from_regular
-            income_remaining = taxable_other_income
-            
-            # If there's still room in the 0% slab
-            if remaining_in_first_slab > 0:
-                tax_free_amount = min(income_remaining, remaining_in_first_slab)
-                income_remaining -= tax_free_amount
-            
-            # Apply remaining slabs
-            for i in range(1, len(slabs)):
-                if income_remaining <= 0:
-                    break
-                
-                slab_limit, rate = slabs[i]
-                taxable_in_slab = min(income_remaining, slab_limit)
-                regular_tax += taxable_in_slab * rate
-                income_remaining -= taxable_in_slab
-    
-    # Step 5: Calculate capital gains tax separately
-    cg_tax = taxable_stcg * 0.20 + final_taxable_ltcg * 0.125
-    
-    # Step 6: Apply rebate ONLY to regular income tax (NOT capital gains)
-    rebate_applied = 0
-    if total_income <= 1200000:  # ₹12L limit
-        rebate_applied = min(60000, regular_tax)  # Max ₹60K rebate on regular tax only
-        regular_tax_after_rebate = max(0, regular_tax - rebate_applied)
-    else:
-        regular_tax_after_rebate = regular_tax
-    
-    # Step 7: Total tax = Regular tax (after rebate) + Capital gains tax (no rebate)
-    total_tax_before_surcharge = regular_tax_after_rebate + cg_tax
-    
-    # Step 8: Apply Marginal Relief for income between ₹12L to ₹12.6L
-    marginal_relief_applied = 0
-    total_taxable_income = total_income + stcg + ltcg
-    
-    if 1200000 < total_taxable_income <= 1260000:
-        # Calculate tax without rebate for marginal relief comparison
-        tax_without_rebate = regular_tax + cg_tax
-        
-        # Marginal relief calculation
-        marginal_relief_amount = total_taxable_income - 1200000
-        
-        # Apply marginal relief - tax cannot exceed the excess over ₹12L
-        if total_tax_before_surcharge > marginal_relief_amount:
-            marginal_relief_applied = total_tax_before_surcharge - marginal_relief_amount
-            total_tax_before_surcharge = marginal_relief_amount
-    
-    # Step 9: Calculate surcharge
-    surcharge_rate = calculate_surcharge_rate(total_income + stcg + ltcg, "new", stcg + ltcg)
-    surcharge = total_tax_before_surcharge * surcharge_rate
-    
-    # Step 10: Calculate cess
-    cess = (total_tax_before_surcharge + surcharge) * 0.04
-    
-    return round(max(total_tax_before_surcharge, 0), 2), round(surcharge, 2), round(cess, 2), round(rebate_applied, 2), round(marginal_relief_applied, 2)
+from tax_engine import DEDUCTION_CAPS, calculate_total_income
+from calc_graph import build_tax_graph, client_result
+from results_tables import results_tables
+from deduction_optimizer import optimize_deductions
+from household import INCOME_HEADS, optimize_household
+from statement_import import import_statement
+from portfolio import PortfolioAggregates, load_result_set
+from result_store import ResultSet
+from cliff_index import CLIFFS, CliffIndex, load_result_set as load_cliff_index
+from result_cache import SharedResultCache
+from lite_budget import FULL_APP, measure_isolated
+from shared_assets import APP_CSS, DEMO_TABLE, NEW_REGIME_SLABS_MD, OLD_REGIME_SLABS_MD, TAX_DATES_TABLE, session_memory_report
 
 # STREAMLIT UI START - ENHANCED VERSION
 
@@ -197,65 +23,27 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Advanced CSS styling with light blue theme
-st.markdown("""
-    <style>
-    .main {
-        padding: 0rem 1rem;
-    }
-    .stApp {
-        background: linear-gradient(135deg, #ADD8E6 0%, #87CEFA 100%);
-    }
-    .main-header {
-        background: linear-gradient(90deg, #4169E1, #6495ED);
-        padding: 2rem;
-        border-radius: 10px;
-        margin-bottom: 2rem;
-        text-align: center;
-        color: white;
-        box-shadow: 0 4px 6px rgba(0,0,0,0.1);
-    }
-    .input-container {
-        background: white;
-        padding: 2rem;
-        border-radius: 15px;
-        box-shadow: 0 8px 16px rgba(0,0,0,0.1);
-        margin-bottom: 2rem;
-    }
-    .result-container {
-        background: linear-gradient(135deg, #ADD8E6 0%, #87CEFA 100%);
-        padding: 2rem;
-        border-radius: 15px;
-        box-shadow: 0 8px 16px rgba(0,0,0,0.1);
-        color: #191970;
-    }
-    .metric-card {
-        background: white;
-        padding: 1.5rem;
-        border-radius: 10px;
-        box-shadow: 0 4px 8px rgba(0,0,0,0.1);
-        margin: 0.5rem;
-        text-align: center;
-    }
-    .stButton > button {
-        background: linear-gradient(90deg, #4169E1, #6495ED);
-        color: white;
-        border: none;
-        padding: 0.75rem 2rem;
-        border-radius: 25px;
-        font-weight: bold;
-        box-shadow: 0 4px 8px rgba(0,0,0,0.2);
-        transition: all 0.3s ease;
-    }
-    .stButton > button:hover {
-        transform: translateY(-2px);
-        box-shadow: 0 6px 12px rgba(0,0,0,0.3);
-    }
-    .sidebar .sidebar-content {
-        background: linear-gradient(135deg, #ADD8E6 0%, #87CEFA 100%);
-    }
-    </style>
-""", unsafe_allow_html=True)
+st.markdown(APP_CSS, unsafe_allow_html=True)
+
+@st.cache_resource
+def get_portfolio():
+    # One client book per server process, shared by every session
+    return PortfolioAggregates()
+
+@st.cache_resource
+def get_result_cache():
+    # Host-wide store shared with the other replicas and batch workers
+    return SharedResultCache()
+
+@st.cache_resource
+def get_cliff_index():
+    # Sorted income index over the same client book
+    return CliffIndex()
+
+@st.cache_resource
+def get_memory_measurement():
+    # Last per-session measurement, shared by every session (filled in on request)
+    return {}
 
 # Header
 st.markdown("""
@@ -288,44 +76,38 @@ with st.sidebar:
     regime_info = st.selectbox("View details for:", ["New Regime", "Old Regime"])
     
     if regime_info == "New Regime":
-        st.markdown("""
-        - **₹0 - 4L:** 0%
-        - **₹4L - 8L:** 5%
-        - **₹8L - 12L:** 10%
-        - **₹12L - 16L:** 15%
-        - **₹16L - 20L:** 20%
-        - **₹20L - 24L:** 25%
-        - **Above ₹24L:** 30%
-        
-        **🆕 Special Benefits:**
-        - **Rebate:** ₹60K for income ≤ ₹12L
-        - **Marginal Relief:** Income ₹12L-₹12.6L
-        - Tax limited to (Income - ₹12L)
-        
-        **CG Exemption Priority:**
-        1. Other income uses ₹4L exemption
-        2. STCG uses remaining exemption
-        3. LTCG (after ₹1.25L) uses last
-        
-        **Tax Rates:** STCG: 20% | LTCG: 12.5%
-        """)
+        st.markdown(NEW_REGIME_SLABS_MD)
     else:
-        st.markdown("""
-        **Old Regime:**
-        - **₹0 - 2.5L:** 0%
-        - **₹2.5L - 5L:** 5%
-        - **₹5L - 10L:** 20%
-        - **Above ₹10L:** 30%
-        
-        **Capital Gains:**
-        - **STCG:** 20%
-        - **LTCG:** 12.5% (above ₹1.25L)
-        """)
+        st.markdown(OLD_REGIME_SLABS_MD)
 
 # Main content area with tabs
-tab1, tab2, tab3 = st.tabs(["🧮 Calculate Tax", "📊 Analysis", "📋 Tax Planning"])
+tab1, tab2, tab3, tab4 = st.tabs(["🧮 Calculate Tax", "📊 Analysis", "📋 Tax Planning", "👪 Household"])
 
 with tab1:
+    # Import Form 26AS / AIS to pre-fill the income and TDS inputs
+    with st.expander("📥 Import Form 26AS / AIS Statement"):
+        statement = st.file_uploader("Statement file (JSON, TXT or CSV export)", type=["json", "txt", "csv"])
+        if statement is not None and st.session_state.get("imported_statement") != statement.file_id:
+            try:
+                imported = import_statement(statement, statement.name)
+            except ValueError as error:
+                st.error(f"❌ Could not read statement: {error}")
+            else:
+                for field, amount in imported.calculator_inputs().items():
+                    st.session_state[field] = float(amount)
+                st.session_state["imported_statement"] = statement.file_id
+                st.session_state["imported_summary"] = imported.summary()
+        
+        if "imported_summary" in st.session_state:
+            summary = st.session_state["imported_summary"]
+            st.success(f"✅ Imported {summary['entries']:,} entries from {summary['source']} - inputs below have been filled in")
+            st.dataframe({
+                "Deductor": list(summary["by_deductor"].keys()),
+                "Income Head": [totals["head"] for totals in summary["by_deductor"].values()],
+                "Amount (₹)": [f"₹{totals['amount']:,.0f}" for totals in summary["by_deductor"].values()],
+                "TDS (₹)": [f"₹{totals['tds']:,.0f}" for totals in summary["by_deductor"].values()]
+            }, use_container_width=True)
+    
     # Input form with enhanced styling
     st.markdown('<div class="input-container">', unsafe_allow_html=True)
     
@@ -348,12 +130,14 @@ with tab1:
             salary = st.number_input(
                 "Salary Income (₹)", 
                 min_value=0.0, 
+                key="salary",
                 step=10000.0,
                 help="Enter your annual salary before standard deduction"
             )
             business_income = st.number_input(
                 "Business/Professional Income (₹)", 
                 min_value=0.0, 
+                key="business_income",
                 step=10000.0,
                 help="Net business or professional income"
             )
@@ -363,6 +147,7 @@ with tab1:
             house_income = st.number_input(
                 "House Property Income (₹)", 
                 min_value=0.0, 
+                key="house_income",
                 step=5000.0,
                 help="Net Annual Value (after municipal taxes)"
             )
@@ -375,6 +160,7 @@ with tab1:
             other_sources = st.number_input(
                 "Other Sources Income (₹)", 
                 min_value=0.0, 
+                key="other_sources",
                 step=5000.0,
                 help="Interest, dividends, etc."
             )
@@ -396,26 +182,92 @@ with tab1:
             tds_paid = st.number_input(
                 "TDS/Advance Tax Paid (₹)", 
                 min_value=0.0, 
+                key="tds_paid",
                 step=1000.0,
                 help="Total tax already paid"
             )
         
+        with st.expander("📑 Old Regime Deductions (80C, 80D, HRA, LTA)"):
+            st.caption("Ignored under the new regime. Amounts above the statutory cap are limited automatically.")
+            deduction_cols = st.columns(3)
+            deductions = {}
+            for i, (head, cap) in enumerate(DEDUCTION_CAPS.items()):
+                with deduction_cols[i % 3]:
+                    deductions[head] = st.number_input(
+                        f"{head} (₹)",
+                        min_value=0.0,
+                        step=5000.0,
+                        help=f"Max ₹{cap:,.0f}" if cap is not None else "Eligible exemption amount"
+                    )
+        
         submitted = st.form_submit_button("🧮 Calculate Tax", use_container_width=True)
     
     st.markdown('</div>', unsafe_allow_html=True)
 
+    # Deduction optimizer in the sidebar - redraws as the budget slider moves
+    if regime == 'old':
+        with st.sidebar:
+            st.markdown("### 🎯 Deduction Optimizer")
+            deduction_budget = st.slider("Investment budget (₹)", 0, 400000, 150000, step=5000)
+            gross_income = calculate_total_income(regime, salary, business_income, house_income, other_sources, house_loan_interest)
+            plan = optimize_deductions(gross_income, stcg, ltcg, deduction_budget, existing_deductions=deductions)
+            
+            if plan["tax_saved"] > 0:
+                st.success(f"Invest **₹{plan['invested']:,.0f}** to save **₹{plan['tax_saved']:,.0f}**")
+                for head, amount in plan["allocation"].items():
+                    st.write(f"- **{head}:** ₹{amount:,.0f}")
+                if plan["unused_budget"] > 0:
+                    st.info(f"Remaining ₹{plan['unused_budget']:,.0f} saves no further tax")
+            else:
+                st.info("No further tax saving available from deductions")
+            
+            fig_frontier = go.Figure(go.Scatter(
+                x=[deduction for deduction, _ in plan["frontier"]],
+                y=[plan["liability_before"] - liability for _, liability in plan["frontier"]],
+                mode="lines+markers",
+                line_color="#4169E1"
+            ))
+            fig_frontier.update_layout(
+                title="Tax Saved vs Investment",
+                xaxis_title="Investment (₹)",
+                yaxis_title="Tax Saved (₹)",
+                height=300,
+                margin=dict(l=10, r=10, t=40, b=10)
+            )
+            st.plotly_chart(fig_frontier, use_container_width=True)
+
     # Calculate and display results
     if submitted:
-        total_income = calculate_total_income(regime, salary, business_income, house_income, other_sources, house_loan_interest)
+        calc_inputs = {
+            "regime": regime,
+            "salary": salary,
+            "business_income": business_income,
+            "house_income": house_income,
+            "house_loan_interest": house_loan_interest,
+            "other_sources": other_sources,
+            "stcg": stcg,
+            "ltcg": ltcg,
+            "tds_paid": tds_paid,
+            "deductions": dict(deductions),
+        }
         
-        if regime == 'old':
-            base_tax, surcharge, cess, rebate_applied, marginal_relief_applied = calculate_tax_old_regime(total_income, stcg, ltcg)
-        else:
-            base_tax, surcharge, cess, rebate_applied, marginal_relief_applied = calculate_tax_new_regime(total_income, stcg, ltcg)
+        # Session's calculation graph - only stages affected by the edited inputs rerun
+        if "calc_graph" not in st.session_state:
+            st.session_state["calc_graph"] = build_tax_graph()
+        graph = st.session_state["calc_graph"]
+        graph.update(**calc_inputs)
         
-        total_tax = base_tax + surcharge + cess
-        net_tax = total_tax - tds_paid
-        total_taxable_income = total_income + stcg + ltcg
+        # Any replica, the lite app or a batch worker may already have calculated these inputs
+        evaluations = graph.stats["evaluations"]
+        result = get_result_cache().calculate(calc_inputs, compute=lambda inputs: client_result(graph.evaluate()))
+        served_from_cache = graph.stats["evaluations"] == evaluations
+        
+        base_tax, surcharge, cess = result["base_tax"], result["surcharge"], result["cess"]
+        rebate_applied, marginal_relief_applied = result["rebate_applied"], result["marginal_relief_applied"]
+        total_tax = result["total_tax"]
+        net_tax = result["net_tax"]
+        total_taxable_income = result["total_taxable_income"]
+        st.session_state["last_result"] = result
         
         # Results with enhanced styling
         st.markdown('<div class="result-container">', unsafe_allow_html=True)
@@ -484,117 +336,22 @@ with tab1:
         
         st.markdown('</div>', unsafe_allow_html=True)
         
-        # Show house property calculation breakdown
-        if house_income > 0 or house_loan_interest > 0:
-            st.markdown("### 🏠 House Property Income Breakdown")
-            net_house_income = (house_income * 0.70) - house_loan_interest
-            
-            house_breakdown = {
-                "Component": ["Gross Annual Value", "Less: 30% Standard Deduction", "Less: Interest on Loan", "Net House Property Income"],
-                "Amount (₹)": [f"₹{house_income:,.0f}", f"₹{house_income * 0.30:,.0f}", f"₹{house_loan_interest:,.0f}", f"₹{max(0, net_house_income):,.0f}"]
-            }
-            
-            house_df = pd.DataFrame(house_breakdown)
-            st.dataframe(house_df, use_container_width=True)
-            
-            if net_house_income < 0:
-                st.info("📌 **Note:** House property shows loss (can be set off against other income as per IT rules)")
-        
-        # Show detailed calculation for new regime with marginal relief
-        if regime == 'new' and (stcg > 0 or ltcg > 0 or total_income > 0):
-            st.markdown("### 🎯 New Regime - Detailed Calculation Breakdown")
-            
-            # Calculate exemption breakdown
-            basic_exemption_limit = 400000
-            taxable_ltcg_after_exemption = max(0, ltcg - 125000)
-            
-            # Calculate step-by-step utilization
-            remaining_exemption = basic_exemption_limit
-            
-            other_exemption = min(total_income, remaining_exemption)
-            remaining_after_other = max(0, remaining_exemption - other_exemption)
-            
-            stcg_exemption = min(stcg, remaining_after_other)
-            remaining_after_stcg = max(0, remaining_after_other - stcg_exemption)
-            
-            ltcg_exemption = min(taxable_ltcg_after_exemption, remaining_after_stcg)
-            
-            final_taxable_other = max(0, total_income - other_exemption)
-            final_taxable_stcg = max(0, stcg - stcg_exemption)
-            final_taxable_ltcg = max(0, taxable_ltcg_after_exemption - ltcg_exemption)
-            
-            st.success(f"**✅ CORRECTED: Slab calculation starts after basic exemption use**")
-            st.write(f"1. **LTCG Exemption:** ₹1,25,000 applied to ₹{ltcg:,.0f} → Taxable LTCG = ₹{taxable_ltcg_after_exemption:,.0f}")
-            st.write(f"2. **Basic Exemption (₹4,00,000) Utilization:**")
-            st.write(f"   - Other income: ₹{other_exemption:,.0f} used, taxable = ₹{final_taxable_other:,.0f}")
-            st.write(f"   - STCG: ₹{stcg_exemption:,.0f} used, taxable = ₹{final_taxable_stcg:,.0f}")
-            st.write(f"   - LTCG: ₹{ltcg_exemption:,.0f} used, taxable = ₹{final_taxable_ltcg:,.0f}")
-            if other_exemption >= 400000:
-                st.write(f"3. **Tax Slab Applied:** Starts from ₹4L-8L slab at 5% (basic exemption fully used)")
-            
-            # Show marginal relief calculation if applicable
-            if 1200000 < total_taxable_income <= 1260000:
-                st.markdown("#### 🎯 Marginal Relief Calculation")
-                excess_over_12l = total_taxable_income - 1200000
-                st.success(f"""
-                **📋 Marginal Relief Applied:**
-                - Total Income: ₹{total_taxable_income:,.0f}
-                - Income Range: ₹12,00,000 - ₹12,60,000 ✅
-                - Excess over ₹12L: ₹{excess_over_12l:,.0f}
-                - **Tax Limited to:** ₹{excess_over_12l:,.0f}
-                - **Relief Amount:** ₹{marginal_relief_applied:,.0f}
-                
-                💡 **This ensures you don't pay more tax than the excess over ₹12L!**
-                """)
-            elif total_taxable_income <= 1200000:
-                st.info("💰 **Income ≤ ₹12L:** Rebate of ₹60K applied instead of marginal relief")
-            elif total_taxable_income > 1260000:
-                st.warning("❌ **Income > ₹12.6L:** No marginal relief applicable")
-            
-            # Show exemption utilization table
-            exemption_data = {
-                "Income Type": ["Other Income", "STCG", "LTCG (after ₹1.25L exemption)", "Total Used"],
-                "Amount": [f"₹{total_income:,.0f}", f"₹{stcg:,.0f}", f"₹{taxable_ltcg_after_exemption:,.0f}", "-"],
-                "Exemption Used": [f"₹{other_exemption:,.0f}", f"₹{stcg_exemption:,.0f}", 
-                                 f"₹{ltcg_exemption:,.0f}", f"₹{other_exemption + stcg_exemption + ltcg_exemption:,.0f}"],
-                "Taxable Amount": [f"₹{final_taxable_other:,.0f}", 
-                                 f"₹{final_taxable_stcg:,.0f}",
-                                 f"₹{final_taxable_ltcg:,.0f}", "-"]
-            }
-            
-            exemption_df = pd.DataFrame(exemption_data)
-            st.dataframe(exemption_df, use_container_width=True)
-        
-        # Detailed breakdown
-        st.markdown("### 📋 Detailed Tax Breakdown")
-        breakdown_components = ["Base Tax", "Surcharge", "Cess", "Total Tax", "TDS Paid", "Net Amount"]
-        breakdown_amounts = [f"{base_tax:,.2f}", f"{surcharge:,.2f}", f"{cess:,.2f}", 
-                           f"{total_tax:,.2f}", f"{tds_paid:,.2f}", f"{abs(net_tax):,.2f}"]
-        breakdown_percentages = [f"{(base_tax/total_tax*100):.1f}%" if total_tax > 0 else "0%",
-                               f"{(surcharge/total_tax*100):.1f}%" if total_tax > 0 else "0%",
-                               f"{(cess/total_tax*100):.1f}%" if total_tax > 0 else "0%",
-                               "100%", "-", "-"]
-        
-        # Add rebate and marginal relief to breakdown if applicable
-        if rebate_applied > 0 or marginal_relief_applied > 0:
-            if rebate_applied > 0:
-                breakdown_components.insert(-3, "Less: Rebate Applied")
-                breakdown_amounts.insert(-3, f"({rebate_applied:,.2f})")
-                breakdown_percentages.insert(-3, "-")
-            
-            if marginal_relief_applied > 0:
-                breakdown_components.insert(-3, "Less: Marginal Relief")
-                breakdown_amounts.insert(-3, f"({marginal_relief_applied:,.2f})")
-                breakdown_percentages.insert(-3, "-")
-        
-        breakdown_data = {
-            "Component": breakdown_components,
-            "Amount (₹)": breakdown_amounts,
-            "Percentage": breakdown_percentages
-        }
-        
-        df = pd.DataFrame(breakdown_data)
-        st.dataframe(df, use_container_width=True)
+        # Breakdown tables - the same ones report_generator writes into client sheets
+        icons = {"House Property Income Breakdown": "🏠", "New Regime - Detailed Calculation Breakdown": "🎯",
+                 "Detailed Tax Breakdown": "📋"}
+        for title, notes, header, rows in results_tables(calc_inputs, result):
+            st.markdown(f"### {icons[title]} {title}")
+            for level, note in notes:
+                getattr(st, level)(note)
+            st.dataframe({column: [row[i] for row in rows] for i, column in enumerate(header)}, use_container_width=True)
+        
+        stats = graph.stats
+        if served_from_cache:
+            st.caption("⚡ Served from the shared result cache")
+        else:
+            st.caption(f"⚡ Recomputed {len(stats['last_computed'])} of {len(stats['last_computed']) + stats['last_skipped']} "
+                       f"calculation stages ({stats['last_skipped']} skipped) - session total: "
+                       f"{stats['computed']} computed, {stats['skipped']} skipped")
 
 with tab2:
     st.markdown("### 📊 Tax Analysis & Visualizations")
@@ -620,14 +377,12 @@ with tab2:
             income_values = [max(0, salary-75000 if regime=='new' else salary-50000), 
                            business_income, net_house_for_chart, other_sources, stcg, ltcg]
             
-            fig_bar = px.bar(
+            fig_bar = go.Figure(go.Bar(
                 x=income_components,
                 y=income_values,
-                title="Income Source Breakdown",
-                color=income_values,
-                color_continuous_scale="viridis"
-            )
-            fig_bar.update_layout(height=400)
+                marker=dict(color=income_values, colorscale="Viridis", showscale=True)
+            ))
+            fig_bar.update_layout(title="Income Source Breakdown", height=400)
             st.plotly_chart(fig_bar, use_container_width=True)
         
         # Effective tax rate
@@ -638,6 +393,83 @@ with tab2:
             # Show marginal relief benefit if applicable
             if regime == 'new' and marginal_relief_applied > 0:
                 st.info(f"💡 **Marginal Relief Saved:** ₹{marginal_relief_applied:,.0f} - Without this relief, your tax would be higher!")
+    
+    # Firm-wide view over the whole client book
+    st.markdown("---")
+    st.markdown("### 🏢 Firm Portfolio")
+    portfolio = get_portfolio()
+    
+    with st.expander("📂 Update client book"):
+        result_file = st.text_input("Batch result file (.apmh)", help="Output of a batch run written with result_store")
+        if st.button("Load batch results") and result_file:
+            try:
+                with ResultSet(result_file) as result_set:
+                    load_result_set(result_set, portfolio, id_prefix=result_file)
+                    load_cliff_index(result_set, get_cliff_index(), id_prefix=result_file)
+            except (OSError, ValueError) as error:
+                st.error(f"❌ Could not load results: {error}")
+        
+        if "last_result" in st.session_state:
+            client_id = st.text_input("Client ID for the last calculation")
+            if st.button("Add / update this client") and client_id:
+                portfolio.upsert(client_id, st.session_state["last_result"])
+                get_cliff_index().upsert(client_id, st.session_state["last_result"])
+    
+    book = portfolio.snapshot()
+    if book["clients"] == 0:
+        st.info("No clients in the portfolio yet - load a batch result file or add a calculation above.")
+    else:
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("👥 Clients", f"{book['clients']:,}")
+        col2.metric("🎯 Avg Effective Rate", f"{book['average_effective_rate']:.2f}%")
+        col3.metric("🆕 In ₹12L-₹12.6L Band", f"{sum(book['marginal_relief_band'].values()):,}",
+                    delta=f"{book['marginal_relief_band']['new']:,} on new regime", delta_color="off")
+        col4.metric("📈 Surcharge Exposure", f"₹{book['totals']['surcharge']:,.0f}",
+                    delta=f"{book['surcharge_clients']:,} clients", delta_color="off")
+        
+        col1, col2 = st.columns([2, 1])
+        with col1:
+            fig_rates = go.Figure([
+                go.Bar(x=book["rate_bins"], y=book["rate_histogram"][regime], name=f"{regime.upper()} regime")
+                for regime in ("old", "new")
+            ])
+            fig_rates.update_layout(title="Effective Tax Rate Distribution", barmode="stack",
+                                    xaxis_title="Effective rate (%)", yaxis_title="Clients", height=400)
+            st.plotly_chart(fig_rates, use_container_width=True)
+        with col2:
+            fig_split = go.Figure(data=[go.Pie(
+                labels=["Old Regime", "New Regime"],
+                values=[book["regime_counts"]["old"], book["regime_counts"]["new"]],
+                hole=0.4,
+                marker_colors=['#FF6B6B', '#45B7D1']
+            )])
+            fig_split.update_layout(title="Regime Split", height=400)
+            st.plotly_chart(fig_split, use_container_width=True)
+        
+        # Clients just below a rebate, relief or surcharge threshold
+        st.markdown("#### 🧗 Clients Near Tax Cliffs")
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            cliff = st.selectbox("Threshold", list(CLIFFS))
+        with col2:
+            within = st.slider("Within (₹ below threshold)", 5000, 200000, 40000, step=5000)
+        with col3:
+            cliff_regime = st.selectbox("Regime", ["Both", "old", "new"])
+        
+        near = get_cliff_index().near_cliff(cliff, within, None if cliff_regime == "Both" else cliff_regime)
+        if near:
+            st.warning(f"⚠️ **{len(near):,} clients** within ₹{within:,} of {cliff} - "
+                       f"₹{sum(row['extra_tax'] for row in near):,.0f} extra tax if they all cross")
+            shown = near[:200]
+            st.dataframe({
+                "Client": [row["client_id"] for row in shown],
+                "Regime": [row["regime"].upper() for row in shown],
+                "Income (₹)": [f"₹{row['income']:,.0f}" for row in shown],
+                "Headroom (₹)": [f"₹{row['gap']:,.0f}" for row in shown],
+                "Extra Tax if Crossed (₹)": [f"₹{row['extra_tax']:,.0f}" for row in shown]
+            }, use_container_width=True)
+        else:
+            st.success(f"✅ No clients within ₹{within:,} of {cliff}")
 
 with tab3:
     st.markdown("### 📋 Tax Planning Suggestions")
@@ -652,6 +484,7 @@ with tab3:
         - 80D medical insurance
         - HRA exemption
         - LTA exemption
+        - **🆕 Deduction Optimizer** in the sidebar shows exactly how much to invest
         
         **For New Regime:**
         - **₹4L basic exemption**
@@ -686,26 +519,117 @@ with tab3:
     if regime == 'new':
         st.markdown("#### 🎯 Marginal Relief Demonstration")
         st.info("See how marginal relief protects you from sudden tax jumps:")
-        
-        demo_data = {
-            "Income (₹)": ["11,99,000", "12,01,000", "12,30,000", "12,60,000", "12,61,000"],
-            "Without Relief": ["₹0*", "₹15,000+", "₹45,000+", "₹75,000+", "₹75,300+"],
-            "With Marginal Relief": ["₹0*", "₹1,000", "₹30,000", "₹60,000", "₹75,300"],
-            "Benefit": ["-", "₹14,000 saved", "₹15,000 saved", "₹15,000 saved", "-"]
-        }
-        
-        demo_df = pd.DataFrame(demo_data)
-        st.dataframe(demo_df, use_container_width=True)
+        st.dataframe(DEMO_TABLE, use_container_width=True)
         st.caption("*After ₹60K rebate. Marginal relief ensures smooth tax progression.")
     
     # Tax calendar
     st.markdown("#### 📅 Important Tax Dates")
-    tax_dates = pd.DataFrame({
-        "Date": ["31st July","15th March","15th December", "15th September", "15th June"],
-        "Event": ["ITR Filing Due Date", "Q4 Advance Tax","Q3 Advance Tax", "Q2 Advance Tax", "Q1 Advance Tax"],
-        "Amount": ["Annual Return", "100% of Tax","75% of Tax", "45% of Tax", "15% of Tax"]
-    })
-    st.dataframe(tax_dates, use_container_width=True)
+    st.dataframe(TAX_DATES_TABLE, use_container_width=True)
+
+with tab4:
+    st.markdown("### 👪 Household Tax Planning")
+    st.info("Enter each family member's fixed income, then the income items that could be held by any of them. "
+            "Each member is taxed under whichever regime is cheaper.")
+    
+    head_labels = {
+        "salary": "Salary",
+        "business_income": "Business",
+        "house_income": "House Property",
+        "house_loan_interest": "Loan Interest",
+        "other_sources": "Other Sources",
+        "stcg": "STCG",
+        "ltcg": "LTCG",
+    }
+    
+    st.markdown("#### Family Members")
+    member_rows = st.data_editor(
+        [{"Name": "Member 1", **{label: 0.0 for label in head_labels.values()}, "80C": 0.0, "80D": 0.0}],
+        num_rows="dynamic",
+        use_container_width=True,
+        key="household_members"
+    )
+    
+    st.markdown("#### Movable Income Items")
+    item_rows = st.data_editor(
+        [{"Item": "Rental Flat", "Income Head": "House Property", "Amount": 0.0, "Eligible Members": ""}],
+        num_rows="dynamic",
+        use_container_width=True,
+        column_config={
+            "Income Head": st.column_config.SelectboxColumn(options=[head_labels[head] for head in INCOME_HEADS]),
+            "Eligible Members": st.column_config.TextColumn(help="Comma separated names, blank = anyone"),
+        },
+        key="household_items"
+    )
+    
+    if st.button("👪 Minimize Household Tax", use_container_width=True):
+        label_to_head = {label: head for head, label in head_labels.items()}
+        members = [
+            {
+                "name": row["Name"],
+                **{head: float(row[label] or 0) for head, label in head_labels.items()},
+                "deductions": {"80C": float(row["80C"] or 0), "80D": float(row["80D"] or 0)},
+            }
+            for row in member_rows if row["Name"]
+        ]
+        items = [
+            {
+                "name": row["Item"],
+                "income": {label_to_head[row["Income Head"]]: float(row["Amount"] or 0)},
+                "eligible": [name.strip() for name in (row["Eligible Members"] or "").split(",") if name.strip()],
+            }
+            for row in item_rows if row["Item"] and row["Income Head"]
+        ]
+        
+        try:
+            household = optimize_household(members, items)
+        except ValueError as error:
+            st.error(f"❌ {error}")
+        else:
+            st.success(f"🎯 Lowest household liability: **₹{household['total_liability']:,.0f}**")
+            
+            col1, col2 = st.columns(2)
+            with col1:
+                st.markdown("#### Who Should Hold What")
+                st.dataframe({
+                    "Item": list(household["allocation"].keys()),
+                    "Assign To": list(household["allocation"].values())
+                }, use_container_width=True)
+            with col2:
+                st.markdown("#### Tax per Member")
+                st.dataframe({
+                    "Member": list(household["members"].keys()),
+                    "Regime": [result["regime"].upper() for result in household["members"].values()],
+                    "Liability (₹)": [f"₹{result['liability']:,.0f}" for result in household["members"].values()]
+                }, use_container_width=True)
+            
+            if not household["proven_optimal"]:
+                st.caption(f"Search stopped after {household['nodes_explored']:,} combinations - best allocation found is shown.")
+
+# Per-session memory report (shared assets are counted once per process, not per session)
+with st.sidebar:
+    with st.expander("🧠 Session Memory"):
+        measurement = get_memory_measurement()
+        if st.button("Measure a session"):
+            with st.spinner("Running a headless session..."):
+                measurement.update(measure_isolated(FULL_APP, reruns=1))
+        if "session_bytes" in measurement:
+            memory = session_memory_report(st.session_state, measurement["session_bytes"])
+            st.write(f"**Each session:** {memory['session_total'] / 1024:,.1f} KiB (measured after one calculation)")
+            for key, size in sorted(memory["session_state"].items(), key=lambda item: -item[1]):
+                st.write(f"- {key}: {size / 1024:,.1f} KiB")
+            st.write(f"- page elements, figures and widgets: {memory['other'] / 1024:,.1f} KiB")
+            st.write(f"**Shared by all sessions:** {memory['shared_total'] / 1024:,.1f} KiB")
+        else:
+            st.caption("Measures a fresh session of this app in a separate process (takes a few seconds).")
+    
+    with st.expander("🗄️ Shared Result Cache"):
+        cache_metrics = get_result_cache().metrics()
+        for scope, label in (("replica", "This replica"), ("all_replicas", "All replicas")):
+            scope_metrics = cache_metrics[scope]
+            st.write(f"**{label}:** {scope_metrics['lookups']:,} lookups, {scope_metrics['hit_rate']:.0%} hits "
+                     f"({scope_metrics['cross_replica_hit_rate']:.0%} from other replicas), "
+                     f"{scope_metrics['mean_lookup_ms']:.2f} ms avg / {scope_metrics['max_lookup_ms']:.1f} ms max")
+        st.caption(f"{cache_metrics['entries']:,} entries | {cache_metrics['all_replicas']['replicas']} replicas | rules {cache_metrics['ruleset_version']}")
 
 # Footer
 st.markdown("---")
@@ -0,0 +1,197 @@
+# REACTIVE CALCULATION GRAPH
+#
+# The calculation as named stages, each declaring which inputs / earlier stages it
+# reads. Updating inputs only marks what actually changed; evaluate() then reruns
+# just the stages downstream of those changes, and stops propagating when a stage
+# comes out with the same value as before (e.g. a salary edit that leaves total
+# income at 0). Counters record how many stages were computed vs skipped.
+
+from tax_engine import (
+    allocate_basic_exemption,
+    apply_deduction_caps,
+    apply_marginal_relief,
+    apply_rebate,
+    calculate_surcharge_rate,
+    calculate_total_income,
+    finalize_tax,
+    new_regime_capital_gains_tax,
+    new_regime_slab_tax,
+    old_regime_capital_gains_tax,
+    old_regime_slab_tax,
+)
+
+INPUTS = {
+    "regime": "new",
+    "salary": 0,
+    "business_income": 0,
+    "house_income": 0,
+    "house_loan_interest": 0,
+    "other_sources": 0,
+    "stcg": 0,
+    "ltcg": 0,
+    "tds_paid": 0,
+    "deductions": None,
+}
+
+class CalcGraph:
+    """Inputs plus stages evaluated in definition order, recomputed only when a dependency changed"""
+
+    def __init__(self, inputs):
+        self.values = dict(inputs)
+        self._stages = []           # (name, function, dependencies)
+        self._changed = set(inputs)
+        self.stats = {"evaluations": 0, "computed": 0, "skipped": 0, "last_computed": [], "last_skipped": 0}
+
+    def stage(self, name, *dependencies):
+        """Decorator registering fn(*dependency values) as a stage"""
+        known = set(self.values) | {stage_name for stage_name, _, _ in self._stages}
+        missing = [dependency for dependency in dependencies if dependency not in known]
+        if missing:
+            raise ValueError(f"Stage {name} depends on unknown input(s)/stage(s): {', '.join(missing)}")
+
+        def register(function):
+            self._stages.append((name, function, dependencies))
+            self._changed.add(name)
+            return function
+        return register
+
+    def update(self, **inputs):
+        """Set input values; only values that differ from the current ones count as changes"""
+        for name, value in inputs.items():
+            if name not in INPUTS:
+                raise ValueError(f"Unknown input: {name}")
+            if self.values.get(name) != value:
+                self.values[name] = value
+                self._changed.add(name)
+        return self
+
+    def evaluate(self):
+        """Recompute stages affected by changes since the last evaluation, returns all values"""
+        changed, computed, skipped = self._changed, [], 0
+        for name, function, dependencies in self._stages:
+            if name in changed or any(dependency in changed for dependency in dependencies):
+                value = function(*(self.values[dependency] for dependency in dependencies))
+                computed.append(name)
+                if name in self.values and self.values[name] == value:
+                    changed.discard(name)  # same result - nothing downstream needs to rerun
+                else:
+                    self.values[name] = value
+                    changed.add(name)
+            else:
+                skipped += 1
+        self._changed = set()
+
+        self.stats["evaluations"] += 1
+        self.stats["computed"] += len(computed)
+        self.stats["skipped"] += skipped
+        self.stats["last_computed"] = computed
+        self.stats["last_skipped"] = skipped
+        return self.values
+
+    def __getitem__(self, name):
+        return self.values[name]
+
+def build_tax_graph(**inputs):
+    """The tax calculation as a graph - same numbers as tax_engine.calculate_client"""
+    graph = CalcGraph({**INPUTS, **inputs})
+
+    @graph.stage("house_property", "house_income", "house_loan_interest")
+    def house_property(house_income, house_loan_interest):
+        return {
+            "gross_annual_value": house_income,
+            "standard_deduction": house_income * 0.30,
+            "loan_interest": house_loan_interest,
+            "net_income": (house_income * 0.70) - house_loan_interest,
+        }
+
+    @graph.stage("total_income", "regime", "salary", "business_income", "house_income", "house_loan_interest", "other_sources", "deductions")
+    def total_income(regime, salary, business_income, house_income, house_loan_interest, other_sources, deductions):
+        total = calculate_total_income(regime, salary, business_income, house_income, other_sources, house_loan_interest)
+        if regime == 'old':
+            _, total_deductions = apply_deduction_caps(deductions)
+            total = max(0, total - total_deductions)
+        return total
+
+    @graph.stage("total_taxable_income", "total_income", "stcg", "ltcg")
+    def total_taxable_income(total_income, stcg, ltcg):
+        return total_income + stcg + ltcg
+
+    @graph.stage("exemption_allocation", "regime", "total_income", "stcg", "ltcg")
+    def exemption_allocation(regime, total_income, stcg, ltcg):
+        # New regime ₹4L basic exemption: other income first, then STCG, then LTCG
+        return allocate_basic_exemption(total_income, stcg, ltcg) if regime == 'new' else None
+
+    @graph.stage("regular_tax", "regime", "total_income", "exemption_allocation")
+    def regular_tax(regime, total_income, exemption_allocation):
+        if regime == 'old':
+            return old_regime_slab_tax(total_income)
+        return new_regime_slab_tax(exemption_allocation)
+
+    @graph.stage("capital_gains_tax", "regime", "stcg", "ltcg", "exemption_allocation")
+    def capital_gains_tax(regime, stcg, ltcg, exemption_allocation):
+        if regime == 'old':
+            return old_regime_capital_gains_tax(stcg, ltcg)
+        return new_regime_capital_gains_tax(exemption_allocation)
+
+    @graph.stage("rebate", "regime", "total_income", "regular_tax")
+    def rebate(regime, total_income, regular_tax):
+        rebate_applied, tax_after_rebate = apply_rebate(regular_tax, total_income, regime)
+        return {"rebate_applied": rebate_applied, "tax_after_rebate": tax_after_rebate}
+
+    @graph.stage("marginal_relief", "regime", "total_taxable_income", "rebate", "capital_gains_tax")
+    def marginal_relief(regime, total_taxable_income, rebate, capital_gains_tax):
+        total_tax_before_surcharge = rebate["tax_after_rebate"] + capital_gains_tax
+        if regime == 'old':
+            return {"marginal_relief_applied": 0, "tax_before_surcharge": total_tax_before_surcharge}
+        relief, total_tax_before_surcharge = apply_marginal_relief(total_tax_before_surcharge, total_taxable_income)
+        return {"marginal_relief_applied": relief, "tax_before_surcharge": total_tax_before_surcharge}
+
+    @graph.stage("surcharge_rate", "regime", "total_taxable_income", "stcg", "ltcg")
+    def surcharge_rate(regime, total_taxable_income, stcg, ltcg):
+        return calculate_surcharge_rate(total_taxable_income, regime, stcg + ltcg)
+
+    @graph.stage("tax", "rebate", "marginal_relief", "surcharge_rate")
+    def tax(rebate, marginal_relief, surcharge_rate):
+        values = finalize_tax(marginal_relief["tax_before_surcharge"], surcharge_rate,
+                              rebate["rebate_applied"], marginal_relief["marginal_relief_applied"])
+        return dict(zip(["base_tax", "surcharge", "cess", "rebate_applied", "marginal_relief_applied"], values))
+
+    @graph.stage("total_tax", "tax")
+    def total_tax(tax):
+        return tax["base_tax"] + tax["surcharge"] + tax["cess"]
+
+    @graph.stage("net_tax", "total_tax", "tds_paid")
+    def net_tax(total_tax, tds_paid):
+        return total_tax - tds_paid
+
+    return graph
+
+def client_result(values):
+    """Evaluated graph values in the shape of tax_engine.calculate_client's result"""
+    return {
+        "regime": values["regime"],
+        "total_income": values["total_income"],
+        "stcg": values["stcg"],
+        "ltcg": values["ltcg"],
+        "total_taxable_income": values["total_taxable_income"],
+        **values["tax"],
+        "total_tax": values["total_tax"],
+        "tds_paid": values["tds_paid"],
+        "net_tax": values["net_tax"],
+    }
+
+def batch_rerun(graphs, changes):
+    """Apply per-client input changes to existing graphs and re-evaluate only those clients.
+
+    graphs: client id -> graph (from build_tax_graph), changes: client id -> {input: value}.
+    New client ids get a fresh graph. Returns (values by client id, stage counters).
+    """
+    results, computed, skipped = {}, 0, 0
+    for client_id, inputs in changes.items():
+        graph = graphs.get(client_id)
+        if graph is None:
+            graph = graphs[client_id] = build_tax_graph()
+        results[client_id] = dict(graph.update(**inputs).evaluate())
+        computed += len(graph.stats["last_computed"])
+        skipped += graph.stats["last_skipped"]
+    return results, {"clients": len(changes), "computed": computed, "skipped": skipped}
@@ -0,0 +1,154 @@
+# CLIFF-PROXIMITY INDEX
+#
+# Sorted income index over the client book, per regime, for finding clients just
+# below a threshold where their tax jumps (rebate limits, end of the marginal
+# relief band, surcharge bands). A query is two binary searches plus one engine
+# call per client found, and updating a client moves only that client's entries.
+
+import threading
+from bisect import bisect_left, bisect_right, insort
+from functools import total_ordering
+
+from result_store import REGIMES
+from tax_engine import calculate_tax_new_regime, calculate_tax_old_regime
+
+# name -> (regimes, income measure, threshold). Rebate is decided on income
+# excluding capital gains, marginal relief and surcharge on income including them.
+CLIFFS = {
+    "Rebate ₹5L": (("old",), "total_income", 500000),
+    "Rebate ₹12L": (("new",), "total_income", 1200000),
+    "Marginal Relief ₹12.6L": (("new",), "total_taxable_income", 1260000),
+    "Surcharge ₹50L": (("old", "new"), "total_taxable_income", 5000000),
+    "Surcharge ₹1Cr": (("old", "new"), "total_taxable_income", 10000000),
+    "Surcharge ₹2Cr": (("old", "new"), "total_taxable_income", 20000000),
+    "Surcharge ₹5Cr": (("old", "new"), "total_taxable_income", 50000000),
+}
+MEASURES = ["total_income", "total_taxable_income"]
+
+@total_ordering
+class _AfterAnyId:
+    """Sorts after every client id, so (income, _AFTER_ANY_ID) bounds all entries at that income"""
+
+    def __eq__(self, other):
+        return self is other
+
+    def __gt__(self, other):
+        return self is not other
+
+_AFTER_ANY_ID = _AfterAnyId()
+
+def _liability(regime, total_income, stcg, ltcg):
+    if regime == 'old':
+        base_tax, surcharge, cess, _, _ = calculate_tax_old_regime(total_income, stcg, ltcg)
+    else:
+        base_tax, surcharge, cess, _, _ = calculate_tax_new_regime(total_income, stcg, ltcg)
+    return base_tax + surcharge + cess
+
+class CliffIndex:
+    """Per regime and income measure, a sorted list of (income, client id)"""
+
+    def __init__(self):
+        self._lock = threading.RLock()  # shared by every Streamlit session
+        self._clients = {}  # client id -> (regime, total_income, stcg, ltcg, total_tax)
+        self._sorted = {(regime, measure): [] for regime in REGIMES for measure in MEASURES}
+
+    def __len__(self):
+        return len(self._clients)
+
+    @staticmethod
+    def _record(result):
+        return (result["regime"], result["total_income"], result["stcg"], result["ltcg"], result["total_tax"])
+
+    @staticmethod
+    def _measures(record):
+        _, total_income, stcg, ltcg, _ = record
+        return {"total_income": total_income, "total_taxable_income": total_income + stcg + ltcg}
+
+    def bulk_load(self, items):
+        """Add or replace many (client id, result) pairs - one sort instead of an insert each"""
+        records = [(client_id, self._record(result)) for client_id, result in items]
+        with self._lock:
+            self._clients.update(records)
+            for key in self._sorted:
+                self._sorted[key] = []
+            for client_id, record in self._clients.items():
+                for measure, income in self._measures(record).items():
+                    self._sorted[(record[0], measure)].append((income, client_id))
+            for entries in self._sorted.values():
+                entries.sort()
+
+    def upsert(self, client_id, result):
+        """Add a client's result (as from calculate_client) or replace their previous one"""
+        record = self._record(result)
+        with self._lock:
+            self.remove(client_id)
+            self._clients[client_id] = record
+            for measure, income in self._measures(record).items():
+                insort(self._sorted[(record[0], measure)], (income, client_id))
+
+    def remove(self, client_id):
+        with self._lock:
+            record = self._clients.pop(client_id, None)
+            if record is None:
+                return
+            for measure, income in self._measures(record).items():
+                entries = self._sorted[(record[0], measure)]
+                del entries[bisect_left(entries, (income, client_id))]
+
+    def clients_below(self, threshold, within, regime, measure="total_taxable_income"):
+        """(income, client id) for clients with threshold - within < income <= threshold"""
+        with self._lock:
+            entries = self._sorted[(regime, measure)]
+            start = bisect_right(entries, (threshold - within, _AFTER_ANY_ID))
+            end = bisect_right(entries, (threshold, _AFTER_ANY_ID))
+            return entries[start:end]
+
+    def near_cliff(self, cliff, within=40000, regime=None):
+        """Clients within `within` below a cliff, with the extra tax for crossing it.
+
+        Extra tax is the liability once income (excluding capital gains) rises just
+        past the threshold, minus today's liability. Sorted by extra tax, largest first.
+        """
+        regimes, measure, threshold = CLIFFS[cliff]
+        found = []
+        # Just past the threshold, income excluding gains is threshold + 1 (less the
+        # gains when the measure includes them) - so it only varies with the gains
+        crossed_liability = {}
+        for cliff_regime in regimes:
+            if regime is not None and cliff_regime != regime:
+                continue
+            for income, client_id in self.clients_below(threshold, within, cliff_regime, measure):
+                record = self._clients.get(client_id)
+                if record is None:
+                    continue  # removed since the range was read
+                record_regime, total_income, stcg, ltcg, total_tax = record
+                gap = threshold - income
+                key = (record_regime, stcg, ltcg)
+                if key not in crossed_liability:
+                    crossed_liability[key] = _liability(record_regime, total_income + gap + 1, stcg, ltcg)
+                crossed = crossed_liability[key]
+                found.append({
+                    "client_id": client_id,
+                    "regime": record_regime,
+                    "income": income,
+                    "gap": gap,
+                    "extra_tax": round(crossed - total_tax, 2),
+                })
+        found.sort(key=lambda row: -row["extra_tax"])
+        return found
+
+def load_result_set(result_set, index=None, id_prefix="row"):
+    """Bulk-load every row of a ResultSet (see result_store) into a CliffIndex"""
+    if index is None:
+        index = CliffIndex()
+    names = ["regime", "total_income", "stcg", "ltcg", "total_tax"]
+    columns = [result_set.column(name) for name in names]
+    try:
+        index.bulk_load(
+            (f"{id_prefix}-{row}", dict(zip(names, (REGIMES[values[0]],) + values[1:])))
+            for row, values in enumerate(zip(*columns))
+        )
+    finally:
+        for column in columns:
+            column.release()
+    return index
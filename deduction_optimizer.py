@@ -0,0 +1,107 @@
+# OLD REGIME DEDUCTION OPTIMIZER
+#
+# Old regime liability (base tax + surcharge + cess) is piecewise-linear in normal
+# income: slopes only change at the slab limits and jump only at the rebate limit
+# and the surcharge thresholds. So instead of trying combinations of investments we
+# only evaluate liability at those breakpoints - a handful of calls per budget.
+
+import math
+
+from tax_engine import DEDUCTION_CAPS, apply_deduction_caps, calculate_tax_old_regime
+
+OLD_REGIME_SLAB_LIMITS = [250000, 500000, 1000000]
+OLD_REGIME_REBATE_LIMIT = 500000
+SURCHARGE_THRESHOLDS = [5000000, 10000000, 20000000, 50000000]
+
+def old_regime_liability(total_income, stcg, ltcg):
+    """Total old regime liability (base tax + surcharge + cess)"""
+    base_tax, surcharge, cess, _, _ = calculate_tax_old_regime(total_income, stcg, ltcg)
+    return round(base_tax + surcharge + cess, 2)
+
+def _breakpoints(stcg, ltcg):
+    """Normal-income values where the liability curve bends or jumps"""
+    points = set(OLD_REGIME_SLAB_LIMITS)
+    # Surcharge band is decided on income including capital gains
+    for threshold in SURCHARGE_THRESHOLDS:
+        points.add(threshold - (stcg + ltcg))
+    # Cliffs: benefit applies up to the limit, so also look one rupee past it
+    cliffs = {OLD_REGIME_REBATE_LIMIT} | {t - (stcg + ltcg) for t in SURCHARGE_THRESHOLDS}
+    points |= {c + 1 for c in cliffs}
+    return sorted(p for p in points if p >= 0)
+
+def _deduction_room(existing_deductions):
+    """Remaining room under each capped head after what is already claimed"""
+    claimed, _ = apply_deduction_caps(existing_deductions)
+    return {head: cap - claimed.get(head, 0) for head, cap in DEDUCTION_CAPS.items() if cap is not None}
+
+def _max_deduction(total_income, budget, existing_deductions):
+    _, already_claimed = apply_deduction_caps(existing_deductions)
+    starting_income = max(0, total_income - already_claimed)
+    room = sum(_deduction_room(existing_deductions).values())
+    return starting_income, max(0, min(budget, room, starting_income))
+
+def savings_frontier(total_income, stcg, ltcg, budget, existing_deductions=None):
+    """Liability at every breakpoint reachable with the budget.
+
+    Returns a list of (additional deduction, liability) sorted by deduction - the
+    exact curve, since liability is linear between consecutive points. Deductions
+    are whole rupees, rounded up so a fractional income (house property is taxed
+    on 70% of its value) really does end up at or under each breakpoint.
+    """
+    starting_income, max_deduction = _max_deduction(total_income, budget, existing_deductions)
+
+    deductions = {0, max_deduction}
+    deductions |= {min(max_deduction, math.ceil(starting_income - p))
+                   for p in _breakpoints(stcg, ltcg) if starting_income - max_deduction < p < starting_income}
+
+    frontier = [(deduction, old_regime_liability(starting_income - deduction, stcg, ltcg)) for deduction in deductions]
+    return sorted(frontier)
+
+def optimize_deductions(total_income, stcg, ltcg, budget, existing_deductions=None, priority=None):
+    """Allocate up to `budget` across deduction heads to minimize old regime liability.
+
+    Every head reduces normal income rupee for rupee, so the question is how much
+    to invest: the smallest amount that reaches the minimum liability. Anything
+    beyond that (e.g. income already under the rebate limit) saves nothing and is
+    left as unused budget. Heads are filled in `priority` order (default: the
+    order of DEDUCTION_CAPS), skipping heads without a statutory cap.
+    """
+    frontier = savings_frontier(total_income, stcg, ltcg, budget, existing_deductions)
+    liability_before = frontier[0][1]
+    liability_after = min(liability for _, liability in frontier)
+
+    # Liability never rises with more deduction, so the first point that reaches
+    # the minimum is where extra investment stops paying off
+    needed = next(deduction for deduction, liability in frontier if liability - liability_after < 0.01)
+
+    room = _deduction_room(existing_deductions)
+    allocation = {}
+    remaining = needed
+    for head in priority or room:
+        if head not in room:
+            raise ValueError(f"Deduction head without a statutory cap cannot be optimized: {head}")
+        if remaining <= 0:
+            break
+        amount = min(room[head], remaining)
+        if amount > 0:
+            allocation[head] = amount
+            remaining -= amount
+
+    invested = round(needed - remaining, 2)
+
+    # Report what claiming the allocation actually does, through the engine itself
+    claimed = dict(existing_deductions or {})
+    for head, amount in allocation.items():
+        claimed[head] = claimed.get(head, 0) + amount
+    base_tax, surcharge, cess, _, _ = calculate_tax_old_regime(total_income, stcg, ltcg, claimed)
+    liability_after = round(base_tax + surcharge + cess, 2)
+
+    return {
+        "allocation": allocation,
+        "invested": invested,
+        "unused_budget": round(budget - invested, 2),
+        "liability_before": liability_before,
+        "liability_after": liability_after,
+        "tax_saved": round(liability_before - liability_after, 2),
+        "frontier": frontier,
+    }
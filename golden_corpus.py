@@ -0,0 +1,294 @@
+# GOLDEN REGRESSION CORPUS
+#
+# A seeded corpus of input combinations packed around the slab, rebate, marginal
+# relief and surcharge breakpoints, with the engine's outputs stored alongside as
+# compressed integer paise. After a logic change, diff() recomputes the whole corpus
+# with numpy and compares it to the golden outputs in one vectorized pass, reporting
+# how many rows moved and the worst cases per breakpoint region.
+#
+#   python golden_corpus.py build golden.npz --rows 2000000 --seed 42
+#   python golden_corpus.py diff golden.npz --engine current   (or legacy / scalar)
+#
+# The current engine is tax_engine itself: its building blocks take numpy arrays,
+# so calculate_client runs on whole columns and any rule change shows up in the
+# vectorized diff. legacy mirrors the original Temp Calc SL.py logic.
+# check_vectorized_engine() still compares the array run with the row-by-row run
+# on a sample before anything is built or diffed.
+
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from tax_engine import DEDUCTION_CAPS, calculate_client, round2
+
+INPUT_COLUMNS = ["regime", "salary", "business_income", "house_income", "house_loan_interest",
+                 "other_sources", "stcg", "ltcg", "deduction_80c"]
+OUTPUT_COLUMNS = ["base_tax", "surcharge", "cess", "rebate_applied", "marginal_relief_applied", "total_tax"]
+TOLERANCE = 0.005  # ₹ - anything under half a paisa is float noise
+
+# (region name, regime, breakpoint, measured on income incl. capital gains?)
+# Slabs and rebates apply to normal income; marginal relief and surcharge to the
+# total taxable income, so those breakpoints must be hit with the gains included
+REGIONS = [
+    ("Old ₹2.5L slab", "old", 250000, False),
+    ("Old ₹5L rebate/slab", "old", 500000, False),
+    ("Old ₹10L slab", "old", 1000000, False),
+    ("New ₹4L slab", "new", 400000, False),
+    ("New ₹8L slab", "new", 800000, False),
+    ("New ₹12L rebate", "new", 1200000, False),
+    ("New ₹12.6L relief end", "new", 1260000, True),
+    ("New ₹16L slab", "new", 1600000, False),
+    ("New ₹20L slab", "new", 2000000, False),
+    ("New ₹24L slab", "new", 2400000, False),
+    ("Old ₹50L surcharge", "old", 5000000, True),
+    ("Old ₹1Cr surcharge", "old", 10000000, True),
+    ("Old ₹2Cr surcharge", "old", 20000000, True),
+    ("Old ₹5Cr surcharge", "old", 50000000, True),
+    ("New ₹50L surcharge", "new", 5000000, True),
+    ("New ₹1Cr surcharge", "new", 10000000, True),
+    ("New ₹2Cr surcharge", "new", 20000000, True),
+    ("New ₹5Cr surcharge", "new", 50000000, True),
+    ("Background", None, None, False),
+]
+BACKGROUND_SHARE = 0.10
+
+def generate_corpus(rows, seed=42):
+    """Seeded inputs, 90% within a few percent of a breakpoint, 10% spread log-uniformly"""
+    rng = np.random.default_rng(seed)
+    region = rng.integers(0, len(REGIONS) - 1, rows)
+    region[rng.random(rows) < BACKGROUND_SHARE] = len(REGIONS) - 1
+
+    region_regime = np.array([1 if regime == "new" else 0 for _, regime, _, _ in REGIONS[:-1]] + [0])
+    region_point = np.array([point for _, _, point, _ in REGIONS[:-1]] + [0], dtype=np.float64)
+    region_on_total = np.array([on_total for _, _, _, on_total in REGIONS])
+    background = region == len(REGIONS) - 1
+
+    regime = np.where(background, rng.integers(0, 2, rows), region_regime[region]).astype(np.uint8)
+    # Target income: breakpoint ± max(₹50k, 2%), most rows much closer
+    point = region_point[region]
+    width = np.maximum(50000, point * 0.02)
+    target = point + width * rng.uniform(-1, 1, rows) ** 3
+    target = np.where(background, 10 ** rng.uniform(4, 9, rows), target)
+
+    # Capital gains on 40% of rows. For breakpoints on total taxable income the gains
+    # are part of the target (scaled down if they alone would exceed it) and normal
+    # income makes up the rest; elsewhere normal income is the target
+    has_gains = rng.random(rows) < 0.4
+    stcg = np.where(has_gains & (rng.random(rows) < 0.5), rng.uniform(0, 500000, rows), 0)
+    ltcg = np.where(has_gains, rng.uniform(0, 800000, rows), 0)
+    on_total = region_on_total[region]
+    gains = stcg + ltcg
+    scale = np.where(on_total & (gains > target), target / np.maximum(gains, 1), 1)
+    stcg, ltcg = stcg * scale, ltcg * scale
+    target = np.where(on_total, target - (stcg + ltcg), target)
+    # Other heads on some rows, salary makes up the rest
+    house_income = np.where(rng.random(rows) < 0.2, rng.uniform(0, 600000, rows), 0)
+    house_loan_interest = np.where(house_income > 0, rng.uniform(0, 200000, rows), 0)
+    other_sources = np.where(rng.random(rows) < 0.3, rng.uniform(0, 100000, rows), 0)
+    business_income = np.where(rng.random(rows) < 0.15, rng.uniform(0, 1, rows) * target, 0)
+    deduction_80c = np.where((regime == 0) & (rng.random(rows) < 0.5), rng.uniform(0, 200000, rows), 0)
+
+    standard_deduction = np.where(regime == 1, 75000, 50000)
+    net_house = np.maximum(0, house_income * 0.70 - house_loan_interest)
+    deductions = np.minimum(deduction_80c, DEDUCTION_CAPS["80C"])
+    salary = np.maximum(0, target + deductions - business_income - net_house - other_sources) + standard_deduction
+
+    corpus = {
+        "regime": regime,
+        "salary": salary,
+        "business_income": business_income,
+        "house_income": house_income,
+        "house_loan_interest": house_loan_interest,
+        "other_sources": other_sources,
+        "stcg": stcg,
+        "ltcg": ltcg,
+        "deduction_80c": deduction_80c,
+    }
+    # Whole rupees: exact in both float64 and int64, and compress well
+    corpus = {name: np.round(values).astype(np.int64) for name, values in corpus.items()}
+    corpus["regime"] = regime
+    corpus["region"] = region.astype(np.uint8)
+    return corpus
+
+def current_engine(corpus):
+    """tax_engine.calculate_client itself, run on whole columns - one call per regime"""
+    is_new = corpus["regime"] == 1
+    rows = len(is_new)
+    outputs = {name: np.zeros(rows) for name in OUTPUT_COLUMNS}
+    for regime, selected in (("old", ~is_new), ("new", is_new)):
+        if not selected.any():
+            continue
+        client = {name: corpus[name][selected] for name in INPUT_COLUMNS if name not in ("regime", "deduction_80c")}
+        client["regime"] = regime
+        if regime == "old":
+            client["deductions"] = {"80C": corpus["deduction_80c"][selected]}
+        result = calculate_client(client)
+        for name in OUTPUT_COLUMNS:
+            outputs[name][selected] = result[name]
+    return outputs
+
+def legacy_engine(corpus):
+    """Vectorized original Temp Calc SL.py logic: no surcharge, marginal relief, loan
+    interest or deductions, and the rebate taken off capital gains tax too"""
+    is_new = corpus["regime"] == 1
+    salary = corpus["salary"] - np.where(is_new, 75000, 50000)
+    x = (np.maximum(0, salary) + np.maximum(0, corpus["business_income"])
+         + np.maximum(0, corpus["house_income"] * 0.70) + np.maximum(0, corpus["other_sources"]))
+    stcg_tax = corpus["stcg"] * 0.20
+    ltcg_tax = np.where(corpus["ltcg"] > 125000, (corpus["ltcg"] - 125000) * 0.125, 0)
+
+    old_tax = np.select([x <= 250000, x <= 500000, x <= 1000000],
+                        [0.0, (x - 250000) * 0.05, 12500 + (x - 500000) * 0.2],
+                        112500 + (x - 1000000) * 0.3) + stcg_tax + ltcg_tax
+    old_tax = np.where(x <= 500000, old_tax - np.minimum(12500, old_tax), old_tax)
+
+    new_tax = np.zeros_like(x)
+    for k, rate in enumerate((0.00, 0.05, 0.10, 0.15, 0.20, 0.25)):
+        new_tax = new_tax + np.clip(x - 400000 * k, 0, 400000) * rate
+    new_tax = new_tax + np.maximum(0, x - 2400000) * 0.30 + stcg_tax + ltcg_tax
+    new_tax = np.where(x <= 1200000, new_tax - np.minimum(60000, new_tax), new_tax)
+
+    tax = np.maximum(np.where(is_new, new_tax, old_tax), 0)
+    return {"total_tax": round2(tax * 1.04)}
+
+ENGINES = {"current": current_engine, "legacy": legacy_engine}
+
+def _scalar_rows(chunk):
+    results = []
+    for row in zip(*(chunk[name] for name in INPUT_COLUMNS)):
+        values = dict(zip(INPUT_COLUMNS, (int(value) for value in row)))
+        values["regime"] = "new" if values["regime"] == 1 else "old"
+        values["deductions"] = {"80C": values.pop("deduction_80c")}
+        result = calculate_client(values)
+        results.append([result[name] for name in OUTPUT_COLUMNS])
+    return np.array(results, dtype=np.float64).reshape(-1, len(OUTPUT_COLUMNS))
+
+def scalar_engine(corpus, workers=None, chunk_rows=50000):
+    """tax_engine itself, row by row in a process pool - slow, but always the real thing"""
+    rows = len(corpus["regime"])
+    chunks = [{name: corpus[name][start:start + chunk_rows] for name in INPUT_COLUMNS}
+              for start in range(0, rows, chunk_rows)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        stacked = np.concatenate(list(pool.map(_scalar_rows, chunks))) if chunks else np.zeros((0, len(OUTPUT_COLUMNS)))
+    return {name: stacked[:, i] for i, name in enumerate(OUTPUT_COLUMNS)}
+
+def check_vectorized_engine(corpus, sample=20000, seed=0):
+    """Raise if the array run disagrees with row-by-row tax_engine on a random sample"""
+    rng = np.random.default_rng(seed)
+    rows = rng.choice(len(corpus["regime"]), size=min(sample, len(corpus["regime"])), replace=False)
+    subset = {name: corpus[name][rows] for name in INPUT_COLUMNS}
+    expected = _scalar_rows(subset)
+    actual = current_engine(subset)
+    for i, name in enumerate(OUTPUT_COLUMNS):
+        mismatched = np.abs(actual[name] - expected[:, i]) > TOLERANCE
+        if mismatched.any():
+            row = int(rows[np.argmax(mismatched)])
+            raise AssertionError(f"Vectorized engine disagrees with tax_engine on {name} "
+                                 f"(row {row}: {actual[name][np.argmax(mismatched)]} vs {expected[np.argmax(mismatched), i]}) "
+                                 "- a rule that only works on numbers? diff with --engine scalar")
+
+def build_golden(path, rows, seed=42):
+    """Generate the corpus, compute outputs with the current engine and save compactly"""
+    corpus = generate_corpus(rows, seed)
+    check_vectorized_engine(corpus)
+    outputs = current_engine(corpus)
+    meta = {"rows": rows, "seed": seed, "regions": [name for name, _, _, _ in REGIONS], "built": time.time()}
+    np.savez_compressed(
+        path,
+        meta=np.array(json.dumps(meta)),
+        **corpus,
+        **{f"golden_{name}": np.round(values * 100).astype(np.int64) for name, values in outputs.items()},
+    )
+    return meta
+
+def load_golden(path):
+    with np.load(path) as data:
+        meta = json.loads(str(data["meta"]))
+        corpus = {name: data[name] for name in INPUT_COLUMNS + ["region"]}
+        golden = {name: data[f"golden_{name}"] / 100 for name in OUTPUT_COLUMNS}
+    return meta, corpus, golden
+
+def diff(path, engine="current", column="total_tax", worst=3):
+    """Compare an engine with the golden outputs, per breakpoint region.
+
+    engine: "current" / "legacy" (vectorized), "scalar" (tax_engine in a process
+    pool) or any callable taking the corpus and returning {column: array}.
+    """
+    meta, corpus, golden = load_golden(path)
+    started = time.perf_counter()
+    if engine == "scalar":
+        outputs = scalar_engine(corpus)
+    else:
+        if engine == "current":
+            check_vectorized_engine(corpus)
+        outputs = (ENGINES[engine] if isinstance(engine, str) else engine)(corpus)
+
+    delta = outputs[column] - golden[column]
+    changed = np.abs(delta) > TOLERANCE
+    region = corpus["region"].astype(np.int64)
+    regions = len(meta["regions"])
+    rows = np.bincount(region, minlength=regions)
+    changed_rows = np.bincount(region, weights=changed, minlength=regions)
+    delta_sum = np.bincount(region, weights=np.where(changed, delta, 0), minlength=regions)
+    # Worst cases per region: sort by (region, |delta|) once, take the tail of each region
+    order = np.lexsort((np.abs(delta), region))
+    region_end = np.cumsum(rows)
+
+    report = []
+    for r, name in enumerate(meta["regions"]):
+        tail = order[max(region_end[r] - worst, region_end[r] - rows[r]):region_end[r]][::-1]
+        report.append({
+            "region": name,
+            "rows": int(rows[r]),
+            "changed": int(changed_rows[r]),
+            "changed_share": float(changed_rows[r] / rows[r]) if rows[r] else 0.0,
+            "mean_change": float(delta_sum[r] / changed_rows[r]) if changed_rows[r] else 0.0,
+            "worst": [
+                {
+                    "row": int(i),
+                    "delta": float(delta[i]),
+                    "golden": float(golden[column][i]),
+                    "new": float(outputs[column][i]),
+                    "inputs": {name: int(corpus[name][i]) for name in INPUT_COLUMNS},
+                }
+                for i in tail if changed[i]
+            ],
+        })
+    return {
+        "rows": int(len(delta)),
+        "changed": int(changed.sum()),
+        "max_abs_change": float(np.abs(delta).max()) if len(delta) else 0.0,
+        "seconds": round(time.perf_counter() - started, 3),
+        "regions": report,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Golden regression corpus for the tax engine")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build")
+    build.add_argument("path")
+    build.add_argument("--rows", type=int, default=2000000)
+    build.add_argument("--seed", type=int, default=42)
+    compare = commands.add_parser("diff")
+    compare.add_argument("path")
+    compare.add_argument("--engine", choices=["current", "legacy", "scalar"], default="current")
+    compare.add_argument("--column", choices=OUTPUT_COLUMNS, default="total_tax")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        started = time.perf_counter()
+        build_golden(args.path, args.rows, args.seed)
+        print(f"Built {args.rows:,} rows in {time.perf_counter() - started:.1f}s -> {args.path}")
+        sys.exit(0)
+
+    result = diff(args.path, args.engine, args.column)
+    print(f"{result['changed']:,} of {result['rows']:,} rows changed (max ₹{result['max_abs_change']:,.2f}) in {result['seconds']}s")
+    for region in result["regions"]:
+        print(f"  {region['region']:<24} {region['changed']:>10,} / {region['rows']:<10,} "
+              f"({region['changed_share']:.1%}), mean change ₹{region['mean_change']:,.2f}")
+        for case in region["worst"]:
+            print(f"      row {case['row']}: ₹{case['golden']:,.2f} -> ₹{case['new']:,.2f} ({case['delta']:+,.2f}) {case['inputs']}")
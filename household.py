@@ -0,0 +1,621 @@
+# HOUSEHOLD TAX MINIMIZER
+#
+# Assigns movable income items (rental property, FDs, LTCG to be realized...) to
+# family members so the total household liability is lowest, with every member
+# taxed under whichever regime is cheaper for them.
+
+import time
+from bisect import bisect_right
+from functools import lru_cache
+from itertools import accumulate, chain, product
+
+from deduction_optimizer import OLD_REGIME_SLAB_LIMITS
+from tax_engine import (
+    CESS_RATE,
+    LTCG_EXEMPTION,
+    NEW_REGIME_BASIC_EXEMPTION,
+    NEW_REGIME_SLABS,
+    REBATE,
+    allocate_basic_exemption,
+    apply_deduction_caps,
+    apply_rebate,
+    calculate_surcharge_rate,
+    calculate_total_income,
+    calculate_tax_old_regime,
+    calculate_tax_new_regime,
+    new_regime_slab_tax,
+    old_regime_capital_gains_tax,
+    old_regime_slab_tax,
+)
+
+INCOME_HEADS = ["salary", "business_income", "house_income", "house_loan_interest", "other_sources", "stcg", "ltcg"]
+
+# Safety limits so the Streamlit page always answers quickly; the best allocation
+# found so far is returned (with proven_optimal=False) when either is hit
+MAX_NODES = 200000
+TIME_LIMIT_SECONDS = 0.8
+MAX_FILLS = 20000
+
+@lru_cache(maxsize=200000)
+def member_liability(salary, business_income, house_income, house_loan_interest, other_sources, stcg, ltcg, old_regime_deductions=0):
+    """Cheaper of old and new regime liability for one member, returns (regime, liability)"""
+    results = []
+    for regime in ("old", "new"):
+        total_income = calculate_total_income(regime, salary, business_income, house_income, other_sources, house_loan_interest)
+        if regime == "old":
+            total_income = max(0, total_income - old_regime_deductions)
+            base_tax, surcharge, cess, _, _ = calculate_tax_old_regime(total_income, stcg, ltcg)
+        else:
+            base_tax, surcharge, cess, _, _ = calculate_tax_new_regime(total_income, stcg, ltcg)
+        results.append((round(base_tax + surcharge + cess, 2), regime))
+    liability, regime = min(results)
+    return regime, liability
+
+def _member_cost(totals, deductions_total):
+    return member_liability(*totals, deductions_total)[1]
+
+_SALARY, _BUSINESS, _HOUSE, _INTEREST, _OTHER, _STCG, _LTCG = range(len(INCOME_HEADS))
+
+# Normal income where the regular tax curve (after rebate) bends or jumps
+_REGULAR_BREAKPOINTS = {
+    "old": tuple(OLD_REGIME_SLAB_LIMITS) + (REBATE["old"][0],),
+    "new": tuple(accumulate(limit for limit, _ in NEW_REGIME_SLABS[:-1])) + (REBATE["new"][0],),
+}
+_EPSILON = 1e-4   # ₹ - stands in for the one-sided limits at the jumps of the tax curves
+_ROUNDING = 0.02  # ₹ - liabilities are rounded per component, so can be this much below the unrounded figure
+_TOLERANCE = 1    # ₹ - the search does not go after allocations that save less than this
+
+def _normal_income(totals, regime):
+    salary, business_income, house_income, house_loan_interest, other_sources, _, _ = totals
+    return calculate_total_income(regime, salary, business_income, house_income, other_sources, house_loan_interest)
+
+def _taxable_income(totals, regime):
+    return _normal_income(totals, regime) + totals[_STCG] + totals[_LTCG]
+
+def _corners(totals, others):
+    """Least and most income a member can reach by adding any part of `others`
+    (loan interest lowers income, so it is at its highest in the low corner)"""
+    low = tuple(total + (amount if head == _INTEREST else 0) for head, (total, amount) in enumerate(zip(totals, others)))
+    high = tuple(total + (0 if head == _INTEREST else amount) for head, (total, amount) in enumerate(zip(totals, others)))
+    return low, high
+
+@lru_cache(maxsize=200000)
+def _regular_tax(normal_income, regime):
+    """Tax on normal income after the rebate"""
+    if regime == "old":
+        tax = old_regime_slab_tax(normal_income)
+    else:
+        tax = new_regime_slab_tax(allocate_basic_exemption(normal_income, 0, 0))
+    return apply_rebate(tax, normal_income, regime)[1]
+
+def _min_rise(function, breakpoints, low, high, step):
+    """Smallest function(x + step) - function(x) over low <= x <= high, for a curve
+    that is linear between breakpoints - so the minimum is at an end of the range or
+    where x or x + step sits at (or just beside) a breakpoint"""
+    candidates = {low, high}
+    for point in breakpoints:
+        candidates.update((point, point - step))
+    rises = [function(x + step) - function(x)
+             for candidate in candidates for x in (candidate - _EPSILON, candidate, candidate + _EPSILON)
+             if low <= x <= high]
+    return min(rises)
+
+def _min_normal_income_rise(totals, others, income, regime):
+    """Smallest rise in normal income (before deductions) from adding `income` to any
+    state between `totals` and `totals + others`. Each head's contribution is convex,
+    so its smallest rise is at one end of the range."""
+    def head(salary=0, business_income=0, house_income=0, other_sources=0, house_loan_interest=0):
+        return calculate_total_income(regime, salary, business_income, house_income, other_sources, house_loan_interest)
+
+    rise = 0
+    for index, name in ((_SALARY, "salary"), (_BUSINESS, "business_income"), (_OTHER, "other_sources")):
+        rise += head(**{name: totals[index] + income[index]}) - head(**{name: totals[index]})
+    # Net house income depends on 70% of the rent less interest: rises least from the
+    # lowest net figure, falls most from the highest
+    house_low = totals[_HOUSE], totals[_INTEREST] + others[_INTEREST]
+    house_high = totals[_HOUSE] + others[_HOUSE], totals[_INTEREST]
+    rise += min(head(house_income=house + income[_HOUSE], house_loan_interest=interest + income[_INTEREST])
+                - head(house_income=house, house_loan_interest=interest)
+                for house, interest in (house_low, house_high))
+    return rise
+
+RELIEF_BAND = (1200000, 1260000)
+
+def _band_in_reach(totals, addable):
+    """Whether adding part of `addable` can leave total income incl. capital gains
+    inside the new regime marginal relief band - the one place where liability can
+    fall as income rises (tax drops to the excess over ₹12L once it is crossed)"""
+    low, high = _corners(totals, addable)
+    return _taxable_income(low, "new") <= RELIEF_BAND[1] and _taxable_income(high, "new") > RELIEF_BAND[0]
+
+@lru_cache(maxsize=200000)
+def _cap_in_reach(totals, addable):
+    """Whether the 15% surcharge cap can start to apply - it does once there are any
+    capital gains, which can lower the surcharge on everything else"""
+    high = _add(totals, addable)
+    return bool(not (totals[_STCG] or totals[_LTCG]) and (addable[_STCG] or addable[_LTCG])
+                and max(_taxable_income(high, regime) for regime in ("old", "new")) > 20000000)
+
+def _envelope_cost(totals, deductions_total, capped):
+    """Liability without marginal relief, with the surcharge capped at 15% if `capped`:
+    monotone in income, and never more than the real liability unless the relief
+    brings the tax down to the excess over ₹12L"""
+    costs = []
+    for regime in ("old", "new"):
+        total_income = _normal_income(totals, regime)
+        if regime == "old":
+            total_income = max(0, total_income - deductions_total)
+            base_tax, _, _, _, relief = calculate_tax_old_regime(total_income, totals[_STCG], totals[_LTCG])
+        else:
+            base_tax, _, _, _, relief = calculate_tax_new_regime(total_income, totals[_STCG], totals[_LTCG])
+        gains = 1 if capped else totals[_STCG] + totals[_LTCG]
+        rate = calculate_surcharge_rate(total_income + totals[_STCG] + totals[_LTCG], regime, gains)
+        costs.append((base_tax + relief) * (1 + rate) * (1 + CESS_RATE))
+    return min(costs)
+
+@lru_cache(maxsize=200000)
+def _old_regime_cost(totals, deductions_total):
+    income = max(0, _normal_income(totals, "old") - deductions_total)
+    return sum(calculate_tax_old_regime(income, totals[_STCG], totals[_LTCG])[:3])
+
+def _old_regime_floor(totals, deductions_total):
+    """Least the old regime can cost a member inside the relief band: income there is
+    at least ₹12L less deductions, and the cheapest way to have it is ₹5L of normal
+    income (rebated) and the rest as LTCG"""
+    least = old_regime_capital_gains_tax(0, RELIEF_BAND[0] - deductions_total - REBATE["old"][0])
+    return max(_old_regime_cost(totals, deductions_total), (1 + CESS_RATE) * least)
+
+@lru_cache(maxsize=200000)
+def _excess_cost(totals, deductions_total):
+    """Liability inside the relief band with the new regime tax at the excess over
+    ₹12L (0 below it): monotone, and the real liability there wherever the relief
+    brings the tax down to that excess"""
+    excess = max(0, _taxable_income(totals, "new") - RELIEF_BAND[0])
+    return min(_old_regime_floor(totals, deductions_total), (1 + CESS_RATE) * excess)
+
+@lru_cache(maxsize=200000)
+def _placement_lower_bound(totals, others, income, deductions_total, capped=False):
+    """Lowest rise in a member's _envelope_cost from receiving an item with `income`,
+    on top of any part of `others` (their other remaining items).
+
+    Regular tax and capital gains tax are bounded separately: regular tax through
+    the smallest rise in normal income and the tax curve, gains tax at the lowest
+    gains (it is convex in them). The new regime basic exemption can shelter at
+    most the unused exemption at the STCG rate. Surcharge and cess only scale the
+    rise up, so the lowest surcharge rate in reach is used.
+    """
+    low, high = _corners(totals, others)
+    if income[_INTEREST]:
+        # Interest lowers liability and can drop a surcharge band; bound it by the
+        # most the member could owe before and the least after
+        return _envelope_cost(_add(low, income), deductions_total, capped) - _envelope_cost(high, deductions_total, capped)
+
+    gains_rise = (old_regime_capital_gains_tax(totals[_STCG] + income[_STCG], totals[_LTCG] + income[_LTCG])
+                  - old_regime_capital_gains_tax(totals[_STCG], totals[_LTCG]))
+    bounds = []
+    for regime in ("old", "new"):
+        step = _min_normal_income_rise(totals, others, income, regime)
+        normal_low, normal_high = _normal_income(low, regime), _normal_income(high, regime)
+        if regime == "old":
+            regular_rise = _min_rise(lambda x: _regular_tax(max(0, x - deductions_total), "old"),
+                                     [point + deductions_total for point in _REGULAR_BREAKPOINTS["old"]] + [deductions_total],
+                                     normal_low, normal_high, step)
+            gains = gains_rise
+        else:
+            regular_rise = _min_rise(lambda x: _regular_tax(x, "new"), _REGULAR_BREAKPOINTS["new"], normal_low, normal_high, step)
+            unused_exemption = max(0, NEW_REGIME_BASIC_EXEMPTION - normal_low)
+            gains = max(0, gains_rise - old_regime_capital_gains_tax(unused_exemption, 0))
+        rate = calculate_surcharge_rate(_taxable_income(low, regime), regime, 1 if capped else low[_STCG] + low[_LTCG])
+        bounds.append((regular_rise + gains) * (1 + rate) * (1 + CESS_RATE))
+    return max(0, min(bounds) - _EPSILON)
+
+def _gains_tax(stcg, ltcg, free, exemption):
+    """Capital gains tax at the old regime rates after `exemption` of LTCG and then
+    `free` of any gains (STCG first - it is taxed higher) go untaxed"""
+    taxable_ltcg = max(0, ltcg - exemption)
+    free_stcg = min(stcg, free)
+    free_ltcg = min(taxable_ltcg, free - free_stcg)
+    return old_regime_capital_gains_tax(stcg - free_stcg, taxable_ltcg - free_ltcg + LTCG_EXEMPTION)
+
+def _lower_hull(points):
+    """Lower convex hull of (x, y) points sorted by x"""
+    hull = []
+    for point in points:
+        while len(hull) >= 2 and ((hull[-1][0] - hull[-2][0]) * (point[1] - hull[-2][1])
+                                  - (hull[-1][1] - hull[-2][1]) * (point[0] - hull[-2][0])) <= 0:
+            hull.pop()
+        hull.append(point)
+    return hull
+
+@lru_cache(maxsize=200000)
+def _capacity_terms(totals, addable, deductions_total, fill=None):
+    """A member's share of the capacity bound, for remaining items without loan
+    interest, for a member bounded by _envelope_cost.
+
+    Liability is split into a part that depends only on normal income and a part
+    that depends only on capital gains, each no more than the real thing:
+      - normal income: regular tax at the lowest surcharge rate in reach, as a convex
+        curve in the extra normal income (the lower hull of the tax curve, so it can
+        be filled greedily across members). `fill` is the most the remaining items
+        can add without leaving the untaxed stretch at the start of the curve, if
+        they cannot fill all of it.
+      - gains: taxed at the old regime rates, with the unused new regime basic
+        exemption free of tax - room that extra normal income uses up first.
+    Returns (cost of normal income as it stands, [(slope, length)] of the curve past
+    the untaxed stretch, length of that stretch, free room for gains, LTCG exemption).
+    """
+    high = _add(totals, addable)
+    gains_in_reach = any(high[head] for head in (_STCG, _LTCG))
+    gains = totals[_STCG] + totals[_LTCG]
+    normal = {regime: _normal_income(totals, regime) for regime in ("old", "new")}
+    rates = {regime: calculate_surcharge_rate(max(0, normal[regime] - (deductions_total if regime == "old" else 0)) + gains,
+                                              regime, 1 if gains_in_reach else 0)
+             for regime in ("old", "new")}
+
+    def curve(x):
+        old = _regular_tax(max(0, normal["old"] + x - deductions_total), "old")
+        new = _regular_tax(normal["new"] + x, "new")
+        return (1 + CESS_RATE) * min((1 + rates["old"]) * old, (1 + rates["new"]) * new)
+
+    # The curve is linear between breakpoints and only jumps up (at the rebate
+    # limits, where it takes the lower value), so the hull only has corners at
+    # breakpoints
+    span = max(_normal_income(high, regime) - normal[regime] for regime in ("old", "new"))
+    corners = {0, span}
+    corners.update(point + deductions_total - normal["old"] for point in _REGULAR_BREAKPOINTS["old"] + (0,))
+    corners.update(point - normal["new"] for point in _REGULAR_BREAKPOINTS["new"])
+    points = [(x, curve(x)) for x in sorted(corners) if 0 <= x <= span]
+    if fill is not None:
+        # Nothing lands between `fill` and the end of the stretch: join the start of
+        # the curve to where it goes on just past the stretch
+        zero = _capacity_terms(totals, addable, deductions_total)[2]
+        points = [(0, points[0][1]), (fill, points[0][1])] + [(x, y) for x, y in points if x > zero]
+        points.insert(2, (zero + _EPSILON, curve(zero + _EPSILON)))
+    hull = _lower_hull(points)
+    segments = [((y2 - y1) / (x2 - x1), x2 - x1) for (x1, y1), (x2, y2) in zip(hull, hull[1:])]
+    zero = sum(length for slope, length in segments if slope <= 0)
+    free = max(0, NEW_REGIME_BASIC_EXEMPTION - normal["new"]) if gains_in_reach else 0
+    return hull[0][1], [segment for segment in segments if segment[0] > 0], zero, free, LTCG_EXEMPTION if high[_LTCG] else 0
+
+def _fixed_rise(totals, income):
+    """Rise in new regime income incl. gains from adding `income` to a member with
+    `totals` or more of every head - None unless it is the same for all of them"""
+    if income[_HOUSE] or income[_INTEREST]:
+        return None
+    if income[_SALARY] and totals[_SALARY] < 75000:
+        return None
+    if (income[_BUSINESS] and totals[_BUSINESS] < 0) or (income[_OTHER] and totals[_OTHER] < 0):
+        return None
+    return income[_SALARY] + income[_BUSINESS] + income[_OTHER] + income[_STCG] + income[_LTCG]
+
+def _subset_sums(sums, amount, limit):
+    """`sums` (sorted totals of some items, up to `limit`) with an item of `amount`
+    added in - None if the amount is unknown or there get to be more than MAX_FILLS"""
+    if sums is None or amount is None:
+        return None
+    if amount <= 0:
+        return sums
+    sums = sorted(set(sums).union(total + amount for total in sums if total + amount <= limit))
+    return tuple(sums) if len(sums) <= MAX_FILLS else None
+
+def _pooled_cost(normal, stcg, ltcg, segments, free_normal, free_gains, free_shared, exemption):
+    """Least cost of placing `normal` income on the members' regular tax curves
+    (`segments`, cheapest first) and taxing the gains, when up to `free_normal` of
+    the normal income and `free_gains` of the gains go untaxed but both draw on the
+    same `free_shared` room. Convex in the free normal income used, so the minimum
+    is where a term bends."""
+    def normal_cost(amount):
+        cost = 0
+        for slope, length in segments:
+            if amount <= 0:
+                break
+            cost += slope * min(length, amount)
+            amount -= length
+        return cost
+
+    top = min(free_normal, normal, free_shared)
+    taxable_ltcg = max(0, ltcg - exemption)
+    candidates = {0, top, free_shared - free_gains, free_shared - stcg, free_shared - stcg - taxable_ltcg}
+    candidates.update(normal - filled for filled in accumulate(length for _, length in segments))
+    return min(normal_cost(normal - used) + (1 + CESS_RATE) * _gains_tax(stcg, ltcg, min(free_gains, free_shared - used), exemption)
+               for used in candidates if 0 <= used <= top)
+
+def _add(totals, income):
+    return tuple(total + amount for total, amount in zip(totals, income))
+
+def optimize_household(members, items):
+    """Find the allocation of movable items that minimizes household tax.
+
+    members: list of {"name", <income heads>..., "deductions": {head: amount}}
+    items:   list of {"name", "income": {head: amount}, "eligible": [member names]}
+             ("eligible" is optional - default is every member)
+
+    Depth-first branch and bound over items, largest first. A partial allocation is
+    pruned when a lower bound on its final cost is within _TOLERANCE of the best
+    complete one. The bound is the larger of every member's cost as it stands plus
+    each remaining item's cheapest placement (see _placement_lower_bound), and the
+    cost of filling the members' low slabs and free room with what is left (see
+    capacity_bound). Members that are identical for every remaining item and
+    identical items are only branched once, repeated partial states are skipped,
+    and every member's liability is cached on its income totals so each state is
+    taxed once.
+    """
+    names = [member["name"] for member in members]
+    if len(set(names)) != len(names):
+        raise ValueError("Member names must be unique")
+
+    base = [tuple(member.get(head, 0) for head in INCOME_HEADS) for member in members]
+    deductions = [apply_deduction_caps(member.get("deductions"))[1] for member in members]
+
+    prepared = []
+    for item in items:
+        unknown = set(item["income"]) - set(INCOME_HEADS)
+        if unknown:
+            raise ValueError(f"Unknown income head(s) in {item['name']}: {', '.join(sorted(unknown))}")
+        eligible = item.get("eligible") or names
+        choices = [names.index(name) for name in eligible]
+        if not choices:
+            raise ValueError(f"No eligible member for {item['name']}")
+        income = tuple(item["income"].get(head, 0) for head in INCOME_HEADS)
+        if any(amount < 0 for amount in income):
+            raise ValueError(f"Income amounts in {item['name']} must not be negative")
+        prepared.append((item["name"], income, tuple(choices)))
+    # Big items first - they decide most of the cost, so pruning kicks in early
+    prepared.sort(key=lambda item: (-sum(item[1]), item[1], item[2]))
+
+    # Per depth and member: income still addable from the remaining items, and which
+    # of them the member may receive (members only interchange if these match)
+    addable = [[(0,) * len(INCOME_HEADS)] * len(members) for _ in range(len(prepared) + 1)]
+    eligibility = [[()] * len(members) for _ in range(len(prepared) + 1)]
+    for depth in range(len(prepared) - 1, -1, -1):
+        _, income, choices = prepared[depth]
+        for m in range(len(members)):
+            eligible = m in choices
+            addable[depth][m] = _add(addable[depth + 1][m], income) if eligible else addable[depth + 1][m]
+            eligibility[depth][m] = (eligible,) + eligibility[depth + 1][m]
+
+    # A member who can end up inside the relief band ends either taxed at the excess
+    # over ₹12L there (see _excess_cost) or at no less than _envelope_cost: the search
+    # runs once for each combination, keeping every member's bound monotone
+    exposed = [m for m in range(len(members)) if _band_in_reach(base[m], addable[0][m])]
+
+    @lru_cache(maxsize=200000)
+    def member_bound(depth, m, totals, excess):
+        """(Lowest possible cost of the member as it stands, lowest rise from receiving
+        each remaining item - inf where not eligible). With `excess` the member ends
+        inside the relief band taxed at the excess over ₹12L - inf if it cannot."""
+        if excess:
+            low, high = _corners(totals, addable[depth][m])
+            if _taxable_income(low, "new") > RELIEF_BAND[1] or _taxable_income(high, "new") <= RELIEF_BAND[0]:
+                return float("inf"), ()
+            # Anything up to ₹12L is free for such a member; count no rises
+            return _excess_cost(low, deductions[m]) - _ROUNDING, tuple(0 if m in choices else float("inf") for _, _, choices in prepared[depth:])
+        capped = _cap_in_reach(totals, addable[depth][m])
+        rises = []
+        for _, income, choices in prepared[depth:]:
+            if m in choices:
+                others = tuple(max(0, total - amount) for total, amount in zip(addable[depth][m], income))
+                rises.append(_placement_lower_bound(totals, others, income, deductions[m], capped))
+            else:
+                rises.append(float("inf"))
+        return _envelope_cost(totals, deductions[m], capped) - _ROUNDING, tuple(rises)
+
+    remaining_interest = [any(income[_INTEREST] for _, income, _ in prepared[depth:]) for depth in range(len(prepared) + 1)]
+    # Least normal income the remaining items add wherever they go - each head rises
+    # least from the members' own income, and interest from every item lowers it most
+    rises = [{m: min(_min_normal_income_rise(base[m], addable[0][m], income, regime) for regime in ("old", "new")) for m in choices}
+             for _, income, choices in prepared]
+    normal_rises = [min(item_rises.values()) for item_rises in rises]
+    remaining_normal = [sum(normal_rises[depth:]) for depth in range(len(prepared) + 1)]
+    remaining_gains = [(sum(income[_STCG] for _, income, _ in prepared[depth:]), sum(income[_LTCG] for _, income, _ in prepared[depth:]))
+                       for depth in range(len(prepared) + 1)]
+
+    # Per depth and member, every amount the remaining items can add up to a limit:
+    # of normal income (as counted above) within the untaxed stretch of the member's
+    # tax curve, and of income incl. gains below the top of the relief band (only
+    # where every item adds a fixed amount - see _fixed_rise). None where unknown.
+    fills = [[(0,)] * len(members) for _ in range(len(prepared) + 1)]
+    crossings = [[(0,)] * len(members) for _ in range(len(prepared) + 1)]
+    for m in range(len(members)):
+        low = _corners(base[m], addable[0][m])[0]
+        fill_limit = max(REBATE["new"][0] - _normal_income(low, "new"), REBATE["old"][0] + deductions[m] - _normal_income(low, "old"))
+        crossing_limit = RELIEF_BAND[1] - _taxable_income(low, "new")
+        for depth in range(len(prepared) - 1, -1, -1):
+            _, income, choices = prepared[depth]
+            fills[depth][m] = _subset_sums(fills[depth + 1][m], rises[depth].get(m, 0), fill_limit)
+            if m in choices:
+                crossings[depth][m] = _subset_sums(crossings[depth + 1][m], _fixed_rise(base[m], income), crossing_limit)
+            else:
+                crossings[depth][m] = crossings[depth + 1][m]
+
+    @lru_cache(maxsize=200000)
+    def member_capacity(depth, m, totals, excess):
+        """A member's share of capacity_bound: (cost as it stands, [(slope, length)]
+        of its regular tax curve, room for free normal income, for free gains, for
+        both together, LTCG exemption, (STCG, LTCG) it already has) - None if it
+        cannot end inside the relief band while `excess` says it does.
+
+        A member taxed at the excess over ₹12L takes anything up to ₹12L for free,
+        and pays for the least it can end up over ₹12L - or takes anything up to
+        ₹12.6L if the old regime might cost less than the excess at the top."""
+        if excess:
+            taxable, sums = _taxable_income(totals, "new"), crossings[depth][m]
+            old_cost = _old_regime_floor(totals, deductions[m])
+            room = RELIEF_BAND[1] - taxable
+            if taxable > RELIEF_BAND[0] or sums is None:
+                cost = _excess_cost(totals, deductions[m])
+                crossing = max(0, RELIEF_BAND[0] - taxable)
+            else:
+                index = bisect_right(sums, RELIEF_BAND[0] - taxable)
+                if index == len(sums) or sums[index] > room:
+                    return None
+                crossing = sums[index]
+                cost = min(old_cost, (1 + CESS_RATE) * (taxable + crossing - RELIEF_BAND[0]))
+            if old_cost >= (1 + CESS_RATE) * (RELIEF_BAND[1] - RELIEF_BAND[0]):
+                # Past that, every rupee costs more than anywhere else
+                room = crossing
+            return cost, (), room, room, room, 0, (0, 0)
+        terms = _capacity_terms(totals, addable[depth][m], deductions[m])
+        sums = fills[depth][m]
+        if sums is not None:
+            fill = sums[bisect_right(sums, terms[2] + _EPSILON) - 1]
+            if fill < terms[2] - 1:
+                terms = _capacity_terms(totals, addable[depth][m], deductions[m], fill)
+        cost, segments, zero, free, exemption = terms
+        return cost, segments, zero, free, max(zero, free), exemption, (totals[_STCG], totals[_LTCG])
+
+    def capacity_bound(depth, state, mode):
+        """Members only have so much room in their low slabs: fill the cheapest room
+        first with the normal income still to place, and tax all the gains after the
+        free room that is left (see _capacity_terms and member_capacity)"""
+        if remaining_interest[depth]:
+            return float("-inf")
+        shares = [member_capacity(depth, m, totals, mode[m]) for m, totals in enumerate(state)]
+        if None in shares:
+            return float("inf")
+        cost, segments, free_normal, free_gains, free_shared, exemption, gains = zip(*shares)
+        stcg, ltcg = remaining_gains[depth]
+        stcg, ltcg = stcg + sum(held for held, _ in gains), ltcg + sum(held for _, held in gains)
+        pooled = _pooled_cost(remaining_normal[depth], stcg, ltcg, sorted(chain.from_iterable(segments)),
+                              sum(free_normal), sum(free_gains), sum(free_shared), sum(exemption))
+        return sum(cost) + pooled - _ROUNDING * len(state)
+
+    def lower_bound(depth, state, mode, enough=float("inf")):
+        capacity = capacity_bound(depth, state, mode)
+        if capacity >= enough:
+            return capacity
+        # Every remaining item still has to go to someone: add its cheapest placement
+        bounds = [member_bound(depth, m, totals, mode[m]) for m, totals in enumerate(state)]
+        placement = sum(cost for cost, _ in bounds) + sum(map(min, zip(*(rises for _, rises in bounds))))
+        return max(placement, capacity)
+
+    def household_cost(state):
+        return sum(_member_cost(totals, deductions[m]) for m, totals in enumerate(state))
+
+    # Incumbent: greedy placement by smallest marginal increase, then local moves
+    started = time.perf_counter()
+    state = list(base)
+    assignment = []
+    for _, income, choices in prepared:
+        m = min(choices, key=lambda c: _member_cost(_add(state[c], income), deductions[c]) - _member_cost(state[c], deductions[c]))
+        state[m] = _add(state[m], income)
+        assignment.append(m)
+    best_assignment, best_cost = _improve(base, prepared, assignment, household_cost)
+    stats = {"nodes": 0, "pruned": 0, "complete": True}
+
+    def search(depth, state, cost, partial, mode, seen, bound):
+        nonlocal best_cost, best_assignment
+        stats["nodes"] += 1
+        if stats["nodes"] > MAX_NODES or time.perf_counter() - started > TIME_LIMIT_SECONDS:
+            stats["complete"] = False
+            return
+        if depth == len(prepared):
+            if cost < best_cost - 0.005:
+                # Allocations next to a good one are often better still
+                best_assignment, best_cost = _improve(base, prepared, list(partial), household_cost)
+            return
+        # The parent's bound holds here too - these allocations are among its own
+        bound = max(bound, lower_bound(depth, state, mode, best_cost - _TOLERANCE))
+        if bound >= best_cost - _TOLERANCE:
+            stats["pruned"] += 1
+            return
+
+        name, income, choices = prepared[depth]
+        # Same item as the previous one: only place it on the same or a later member
+        first = partial[-1] if depth and prepared[depth - 1][1:] == (income, choices) else -1
+        choices = tuple(c for c in choices if c >= first)
+        key = (depth, tuple(state), first)
+        if key in seen:
+            stats["pruned"] += 1
+            return
+        seen.add(key)
+
+        def marginal(c):
+            return _member_cost(_add(state[c], income), deductions[c]) - _member_cost(state[c], deductions[c])
+
+        tried = set()
+        # Lowest index first among equal marginals, so the representative of a group of
+        # interchangeable members is the one the identical-item rule still allows later
+        for m in sorted(choices, key=lambda c: (marginal(c), c)):
+            # Members with identical totals, deductions, bound and remaining eligibility are interchangeable
+            signature = (state[m], deductions[m], mode[m], eligibility[depth][m])
+            if signature in tried:
+                continue
+            tried.add(signature)
+            old_totals = state[m]
+            state[m] = _add(old_totals, income)
+            new_cost = cost - _member_cost(old_totals, deductions[m]) + _member_cost(state[m], deductions[m])
+            partial.append(m)
+            search(depth + 1, state, new_cost, partial, mode, seen, bound)
+            partial.pop()
+            state[m] = old_totals
+            if not stats["complete"]:
+                return
+
+    # Every allocation is bounded correctly in at least one of the searches; most
+    # promising first
+    modes = []
+    for sides in product((False, True), repeat=len(exposed)):
+        mode = [False] * len(members)
+        for m, excess in zip(exposed, sides):
+            mode[m] = excess
+        modes.append((lower_bound(0, list(base), mode), mode))
+    for bound, mode in sorted(modes, key=lambda entry: entry[0]):
+        if bound >= best_cost - _TOLERANCE:
+            stats["pruned"] += 1
+            continue
+        search(0, list(base), household_cost(base), [], mode, set(), bound)
+        if not stats["complete"]:
+            break
+
+    final = list(base)
+    for (_, income, _), m in zip(prepared, best_assignment):
+        final[m] = _add(final[m], income)
+
+    member_results = {}
+    for m, totals in enumerate(final):
+        regime, liability = member_liability(*totals, deductions[m])
+        member_results[names[m]] = {"regime": regime, "liability": liability, "income": dict(zip(INCOME_HEADS, totals))}
+
+    return {
+        "allocation": {name: names[m] for (name, _, _), m in zip(prepared, best_assignment)},
+        "members": member_results,
+        "total_liability": round(best_cost, 2),
+        "proven_optimal": stats["complete"],
+        "nodes_explored": stats["nodes"],
+        "nodes_pruned": stats["pruned"],
+        "seconds": round(time.perf_counter() - started, 4),
+    }
+
+def _improve(base, prepared, assignment, household_cost):
+    """Local search: move single items or swap pairs until nothing improves"""
+    def cost_of(assignment):
+        state = list(base)
+        for (_, income, _), m in zip(prepared, assignment):
+            state[m] = _add(state[m], income)
+        return household_cost(state)
+
+    best = cost_of(assignment)
+    improved = True
+    while improved:
+        improved = False
+        for i, (_, _, choices) in enumerate(prepared):
+            for m in choices:
+                if m == assignment[i]:
+                    continue
+                candidate = list(assignment)
+                candidate[i] = m
+                cost = cost_of(candidate)
+                if cost < best - 0.005:
+                    assignment, best, improved = candidate, cost, True
+        for i in range(len(prepared)):
+            for j in range(i + 1, len(prepared)):
+                mi, mj = assignment[i], assignment[j]
+                if mi == mj or mj not in prepared[i][2] or mi not in prepared[j][2]:
+                    continue
+                candidate = list(assignment)
+                candidate[i], candidate[j] = mj, mi
+                cost = cost_of(candidate)
+                if cost < best - 0.005:
+                    assignment, best, improved = candidate, cost, True
+    return assignment, best
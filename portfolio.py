@@ -0,0 +1,117 @@
+# FIRM-WIDE PORTFOLIO ANALYTICS
+#
+# Keeps the client book's headline numbers (effective rate histogram, regime split,
+# marginal relief band, surcharge exposure) as running totals. Adding, updating or
+# removing a client adjusts the totals by that one client's contribution, so the
+# portfolio view never rescans the book and its size stays fixed however many
+# clients there are.
+
+import threading
+
+from result_store import BAND_EDGES, REGIMES, income_band
+
+RATE_BIN_WIDTH = 1.0    # Effective rate histogram bin width (%)
+RATE_BINS = 40          # 0% - 40%, last bin also takes anything above
+MARGINAL_RELIEF_BAND = (1200000, 1260000)
+
+class PortfolioAggregates:
+    """Incrementally maintained aggregates over a book of client results"""
+
+    def __init__(self):
+        self._lock = threading.Lock()  # shared by every Streamlit session
+        self._clients = {}  # client id -> contribution tuple (see _contribution)
+        self.clients = 0
+        self.regime_counts = {regime: 0 for regime in REGIMES}
+        self.rate_histogram = {regime: [0] * RATE_BINS for regime in REGIMES}
+        self.band_counts = {regime: [0] * (len(BAND_EDGES) + 1) for regime in REGIMES}
+        self.marginal_relief_band = {regime: 0 for regime in REGIMES}
+        self.surcharge_clients = 0
+        self.totals = {"total_taxable_income": 0.0, "total_tax": 0.0, "surcharge": 0.0,
+                       "rebate_applied": 0.0, "marginal_relief_applied": 0.0}
+
+    def __len__(self):
+        return self.clients
+
+    def __contains__(self, client_id):
+        return client_id in self._clients
+
+    @staticmethod
+    def _contribution(result):
+        income = result["total_taxable_income"]
+        rate = result["total_tax"] / income * 100 if income > 0 else 0.0
+        lower, upper = MARGINAL_RELIEF_BAND
+        return (
+            result["regime"],
+            min(int(rate // RATE_BIN_WIDTH), RATE_BINS - 1),
+            income_band(income),
+            lower < income <= upper,
+            tuple(result[name] for name in ("total_taxable_income", "total_tax", "surcharge",
+                                            "rebate_applied", "marginal_relief_applied")),
+        )
+
+    def _apply(self, contribution, sign):
+        regime, rate_bin, band, in_relief_band, amounts = contribution
+        self.clients += sign
+        self.regime_counts[regime] += sign
+        self.rate_histogram[regime][rate_bin] += sign
+        self.band_counts[regime][band] += sign
+        self.marginal_relief_band[regime] += sign * in_relief_band
+        surcharge = amounts[2]
+        self.surcharge_clients += sign * (surcharge > 0)
+        for name, amount in zip(self.totals, amounts):
+            self.totals[name] += sign * amount
+
+    def upsert(self, client_id, result):
+        """Add a client's result, or replace their previous one"""
+        contribution = self._contribution(result)
+        with self._lock:
+            previous = self._clients.get(client_id)
+            if previous is not None:
+                self._apply(previous, -1)
+            self._clients[client_id] = contribution
+            self._apply(contribution, 1)
+
+    def remove(self, client_id):
+        with self._lock:
+            previous = self._clients.pop(client_id, None)
+            if previous is not None:
+                self._apply(previous, -1)
+
+    def snapshot(self):
+        """Everything the portfolio view needs, as plain numbers (cheap to copy)"""
+        with self._lock:
+            return self._snapshot()
+
+    def _snapshot(self):
+        return {
+            "clients": self.clients,
+            "regime_counts": dict(self.regime_counts),
+            "rate_histogram": {regime: list(counts) for regime, counts in self.rate_histogram.items()},
+            "rate_bins": [i * RATE_BIN_WIDTH for i in range(RATE_BINS)],
+            "band_counts": {regime: list(counts) for regime, counts in self.band_counts.items()},
+            "marginal_relief_band": dict(self.marginal_relief_band),
+            "surcharge_clients": self.surcharge_clients,
+            "totals": dict(self.totals),
+            "average_effective_rate": (self.totals["total_tax"] / self.totals["total_taxable_income"] * 100
+                                       if self.totals["total_taxable_income"] > 0 else 0.0),
+        }
+
+def load_result_set(result_set, aggregates=None, id_prefix="row"):
+    """Feed every row of a ResultSet (see result_store) into the aggregates.
+
+    Rows are keyed "<id_prefix>-<row number>" so a later rerun of the same batch
+    replaces them instead of double counting.
+    """
+    if aggregates is None:
+        aggregates = PortfolioAggregates()
+    names = ["regime", "total_taxable_income", "total_tax", "surcharge", "rebate_applied", "marginal_relief_applied"]
+    columns = [result_set.column(name) for name in names]
+    try:
+        for row, values in enumerate(zip(*columns)):
+            result = dict(zip(names, values))
+            result["regime"] = REGIMES[result["regime"]]
+            aggregates.upsert(f"{id_prefix}-{row}", result)
+    finally:
+        for column in columns:
+            column.release()
+    return aggregates
@@ -0,0 +1,249 @@
+# BULK CLIENT REPORTS
+#
+# Per-client computation sheets for filing season: the same metrics, house property
+# breakdown, exemption utilization and detailed tax breakdown the results section
+# shows (both render results_tables), written as one HTML page plus a CSV appendix
+# per client. Templates are compiled once per worker process at import; clients are
+# rendered in batches in a process pool and each report is written to disk as soon
+# as it is rendered, so memory stays flat however many clients there are.
+#
+#   python report_generator.py clients.csv reports/      (or clients.jsonl)
+
+import csv
+import html
+import io
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from string import Template
+
+from calc_graph import INPUTS, build_tax_graph, client_result
+from results_tables import results_tables
+from tax_engine import DEDUCTION_CAPS
+
+BATCH_SIZE = 64         # Clients per task - amortizes the pickling round trip
+MAX_IN_FLIGHT = 4       # Batches queued per worker, bounds memory while reading the client file
+
+PAGE = Template("""<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Tax Computation - $name</title>
+<style>
+body { font-family: sans-serif; margin: 2rem; color: #191970; }
+h1 { background: linear-gradient(90deg, #4169E1, #6495ED); color: white; padding: 1rem; border-radius: 10px; }
+.metrics { display: flex; gap: 1rem; }
+.metric { flex: 1; background: #ADD8E6; padding: 1rem; border-radius: 10px; text-align: center; }
+.metric b { display: block; font-size: 1.4rem; }
+table { border-collapse: collapse; margin: 0.5rem 0 1.5rem; }
+th, td { border: 1px solid #87CEFA; padding: 0.3rem 0.8rem; text-align: right; }
+th:first-child, td:first-child { text-align: left; }
+</style></head><body>
+<h1>Income Tax Computation - $name</h1>
+<p>Client ID: $client_id | Regime: $regime | Generated: $generated</p>
+<h2>Tax Calculation Results</h2>
+<div class="metrics">$metrics</div>
+$benefits$sections</body></html>
+""")
+METRIC = Template('<div class="metric">$label<b>$value</b>$note</div>')
+SECTION = Template("<h2>$title</h2>\n$notes<table><tr>$header</tr>\n$rows</table>\n")
+ROW = Template("<tr>$cells</tr>\n")
+NOTE = Template("<p>$text</p>\n")
+
+def _money(amount):
+    return f"₹{amount:,.0f}"
+
+def _cells(tag, values):
+    return "".join(f"<{tag}>{html.escape(str(value))}</{tag}>" for value in values)
+
+def _amount(name, value, default):
+    if value is None or value == "":
+        return default
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise ValueError(f"{name} must be a number, got {value!r}")
+    try:
+        return float(value)
+    except ValueError:
+        raise ValueError(f"{name} must be a number, got {value!r}") from None
+
+def client_inputs(record):
+    """Calculator inputs from one client record (a CSV row or JSON object).
+
+    Amount columns may be blank; deductions come either as a "deductions" dict or
+    as columns named after the deduction heads (80C, 80D, ...). Anything malformed
+    raises ValueError.
+    """
+    if not isinstance(record, dict):
+        raise ValueError(f"Client record must be an object, got {type(record).__name__}")
+    inputs = {}
+    for name, default in INPUTS.items():
+        value = record.get(name)
+        if name == "regime":
+            if value not in (None, "") and not isinstance(value, str):
+                raise ValueError(f"regime must be 'old' or 'new', got {value!r}")
+            inputs[name] = (value or default).strip().lower()
+        elif name == "deductions":
+            if value in (None, ""):
+                value = {head: record[head] for head in DEDUCTION_CAPS if record.get(head) not in (None, "")}
+            elif not isinstance(value, dict):
+                raise ValueError(f"deductions must be an object of head: amount, got {value!r}")
+            inputs[name] = {str(head): _amount(f"Deduction {head}", amount, 0.0) for head, amount in value.items()} or None
+        else:
+            inputs[name] = _amount(name, value, default)
+    if inputs["regime"] not in ("old", "new"):
+        raise ValueError(f"Unknown regime: {inputs['regime']}")
+    return inputs
+
+def render_report(client_id, name, inputs, result, tables, generated):
+    """(html, csv) text for one client"""
+    regime = inputs["regime"]
+    metrics = "".join(METRIC.substitute(label=label, value=value, note=note) for label, value, note in [
+        ("Taxable Income", _money(result["total_taxable_income"]), f"Regime: {regime.upper()}"),
+        ("Base Tax", _money(result["base_tax"]), "After all reliefs"),
+        ("Total Liability", _money(result["total_tax"]), "Including surcharge & cess"),
+        ("Refund" if result["net_tax"] < 0 else "Payable", _money(abs(result["net_tax"])), "After TDS adjustment"),
+    ])
+    benefits = ""
+    if result["rebate_applied"] > 0:
+        limit = "₹12L" if regime == "new" else "₹5L"
+        benefits += NOTE.substitute(text=f"Rebate applied: {_money(result['rebate_applied'])} (income ≤ {limit}, on regular income tax)")
+    if result["marginal_relief_applied"] > 0:
+        benefits += NOTE.substitute(text=f"Marginal relief applied: {_money(result['marginal_relief_applied'])}")
+
+    sections = "".join(
+        SECTION.substitute(
+            title=title,
+            notes="".join(NOTE.substitute(text=html.escape(note)) for _, note in notes),
+            header=_cells("th", header),
+            rows="".join(ROW.substitute(cells=_cells("td", row)) for row in rows),
+        )
+        for title, notes, header, rows in tables
+    )
+    page = PAGE.substitute(name=html.escape(name), client_id=html.escape(client_id), regime=regime.upper(),
+                           generated=generated, metrics=metrics, benefits=benefits, sections=sections)
+
+    appendix = io.StringIO()
+    writer = csv.writer(appendix)
+    for title, _, header, rows in tables:
+        writer.writerow([title])
+        writer.writerow(header)
+        writer.writerows(rows)
+        writer.writerow([])
+    return page, appendix.getvalue()
+
+def _report_stem(client_id, position):
+    """File name for a client's report - the row position keeps it unique even when
+    client IDs repeat or only differ in characters that are not safe in file names"""
+    safe_id = re.sub(r"[^\w.-]", "_", client_id)
+    return f"{safe_id}_{position + 1}"
+
+def _render_batch(batch, output_dir, generated):
+    """Worker: calculate, render and write each client in the batch, return summaries"""
+    summaries = []
+    for position, record in batch:
+        fields = record if isinstance(record, dict) else {}
+        client_id = str(fields.get("client_id") or f"client_{position + 1}")
+        name = str(fields.get("name") or client_id)
+        try:
+            inputs = client_inputs(record)
+            result = client_result(build_tax_graph(**inputs).evaluate())
+            page, appendix = render_report(client_id, name, inputs, result, results_tables(inputs, result), generated)
+        except (ValueError, TypeError, KeyError) as exc:
+            summaries.append({"client_id": client_id, "name": name, "error": str(exc)})
+            continue
+        stem = os.path.join(output_dir, _report_stem(client_id, position))
+        with open(f"{stem}.html", "w", encoding="utf-8") as out:
+            out.write(page)
+        with open(f"{stem}.csv", "w", encoding="utf-8", newline="") as out:
+            out.write(appendix)
+        summaries.append({
+            "client_id": client_id,
+            "name": name,
+            "regime": inputs["regime"],
+            "total_tax": result["total_tax"],
+            "net_tax": result["net_tax"],
+            "report": f"{stem}.html",
+            "bytes": len(page.encode()) + len(appendix.encode()),
+        })
+    return summaries
+
+def read_clients(path):
+    """Client records from a CSV (one row per client) or JSON lines file, one at a time"""
+    with open(path, encoding="utf-8", newline="") as source:
+        if path.lower().endswith((".jsonl", ".json")):
+            for line in source:
+                if line.strip():
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        yield line.strip()  # reported as that client's error, the run carries on
+        else:
+            yield from csv.DictReader(source)
+
+def generate_reports(clients, output_dir, workers=None, batch_size=BATCH_SIZE):
+    """Render one HTML sheet + CSV appendix per client, yielding a summary per client as
+    it is written. The last item yielded is {"throughput": {...}} with overall stats.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    generated = time.strftime("%d %b %Y %H:%M")
+    started = time.perf_counter()
+    pages = errors = size = 0
+
+    def batches():
+        batch = []
+        for position, record in enumerate(clients):
+            batch.append((position, record))
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        limit = MAX_IN_FLIGHT * workers
+        pending, queued = set(), batches()
+        while True:
+            for batch in queued:
+                pending.add(pool.submit(_render_batch, batch, output_dir, generated))
+                if len(pending) >= limit:
+                    break
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                for summary in future.result():
+                    if "error" in summary:
+                        errors += 1
+                    else:
+                        pages += 1
+                        size += summary["bytes"]
+                    yield summary
+
+    elapsed = max(time.perf_counter() - started, 1e-9)
+    yield {"throughput": {
+        "pages": pages,
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "pages_per_second": round(pages / elapsed, 1),
+        "mb_written": round(size / 1e6, 2),
+    }}
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        sys.exit("Usage: python report_generator.py <clients.csv|clients.jsonl> <output folder>")
+    os.makedirs(sys.argv[2], exist_ok=True)
+    with open(os.path.join(sys.argv[2], "index.csv"), "w", encoding="utf-8", newline="") as index_file:
+        index = csv.writer(index_file)
+        index.writerow(["client_id", "name", "regime", "total_tax", "net_tax", "report", "error"])
+        for result in generate_reports(read_clients(sys.argv[1]), sys.argv[2]):
+            if "throughput" in result:
+                stats = result["throughput"]
+                print(f"{stats['pages']} reports ({stats['errors']} errors) in {stats['seconds']}s "
+                      f"- {stats['pages_per_second']:,.0f} pages/s, {stats['mb_written']} MB")
+            elif "error" in result:
+                index.writerow([result["client_id"], result["name"], "", "", "", "", result["error"]])
+                print(f"{result['client_id']}: ERROR {result['error']}")
+            else:
+                index.writerow([result["client_id"], result["name"], result["regime"],
+                                f"{result['total_tax']:.2f}", f"{result['net_tax']:.2f}", result["report"], ""])
@@ -0,0 +1,217 @@
+# CROSS-PROCESS SHARED RESULT CACHE
+#
+# Calculation results shared by every Streamlit replica and batch worker on the
+# host, stored in one local SQLite file (WAL mode, so readers never block and every
+# write is an atomic transaction). Keys are a hash of the rule set version and the
+# inputs, so a rules change never serves stale numbers and replicas on different
+# versions during a rollout never clash; old versions simply age out. The store is
+# capped at max_entries, evicting least recently used entries. Lookups only read -
+# last-access times are batched and written with the metrics. Each process keeps
+# hit/miss/latency counters and publishes them to the store so metrics() can show
+# all replicas together.
+#
+# The store lives in a directory only the app's user can write to (by default
+# ~/.cache/apmh, or $APMH_RESULT_CACHE), since every replica trusts what it reads.
+
+import hashlib
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+import calc_graph
+import tax_engine
+from tax_engine import calculate_client
+
+DEFAULT_PATH = os.environ.get("APMH_RESULT_CACHE") or os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"), "apmh", "result_cache.sqlite3")
+DEFAULT_MAX_ENTRIES = 200000
+METRICS_FLUSH_SECONDS = 5.0
+TOUCH_FLUSH_ENTRIES = 1000  # Pending last-access updates that force a write before the timer
+
+def _private_store(path):
+    """Create the store's directory and file for this user only, and refuse a
+    directory anyone else can write to (they could plant or poison results)"""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    if hasattr(os, "getuid"):
+        for target in (directory, path):
+            if os.path.exists(target):
+                info = os.stat(target)
+                if info.st_uid != os.getuid() or info.st_mode & 0o022:
+                    raise PermissionError(f"Result cache {target} must be owned by this user and not group/world writable")
+    os.close(os.open(path, os.O_CREAT | os.O_RDWR, 0o600))
+
+def _ruleset_version():
+    """Changes whenever the engine or graph source (slabs, rates, caps...) changes"""
+    digest = hashlib.sha256()
+    for module in (tax_engine, calc_graph):
+        with open(module.__file__, "rb") as source:
+            digest.update(source.read())
+    return digest.hexdigest()[:16]
+
+RULESET_VERSION = _ruleset_version()
+
+def client_inputs(client):
+    """A client's inputs as they key the cache: every calc_graph.INPUTS name with its
+    default filled in, amounts as floats, tds_paid left out (it only moves net_tax,
+    which calculate() derives) and deductions dropped where the regime ignores them"""
+    inputs = {}
+    for name, default in calc_graph.INPUTS.items():
+        value = client.get(name)
+        if name == "tds_paid":
+            continue
+        if name == "regime":
+            inputs[name] = str(value or default)
+        elif name == "deductions":
+            inputs[name] = {str(head): float(amount) for head, amount in (value or {}).items()} or None
+        else:
+            inputs[name] = float(value or default)
+    if inputs["regime"] != "old":
+        inputs["deductions"] = None
+    return inputs
+
+def cache_key(kind, inputs):
+    """Stable hash of a calculation's inputs under the current rule set"""
+    canonical = json.dumps(inputs, sort_keys=True, separators=(",", ":"), default=float)
+    return hashlib.sha256(f"{RULESET_VERSION}|{kind}|{canonical}".encode()).hexdigest()
+
+class SharedResultCache:
+    """Get / put JSON-serializable results in the host-wide store"""
+
+    def __init__(self, path=DEFAULT_PATH, max_entries=DEFAULT_MAX_ENTRIES, replica_id=None):
+        self.path = path
+        self.max_entries = max_entries
+        self.replica_id = replica_id or f"{socket.gethostname()}:{os.getpid()}"
+        self._lock = threading.Lock()  # one connection shared by this process's threads
+        _private_store(path)
+        self._db = sqlite3.connect(path, timeout=10, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("""CREATE TABLE IF NOT EXISTS results (
+            key TEXT PRIMARY KEY, version TEXT, value TEXT, writer TEXT, last_access REAL)""")
+        self._db.execute("CREATE INDEX IF NOT EXISTS results_last_access ON results (last_access)")
+        self._db.execute("""CREATE TABLE IF NOT EXISTS metrics (
+            replica TEXT PRIMARY KEY, lookups INTEGER, hits INTEGER, cross_replica_hits INTEGER,
+            lookup_seconds REAL, max_lookup_seconds REAL, updated REAL)""")
+        self._counters = {"lookups": 0, "hits": 0, "cross_replica_hits": 0, "lookup_seconds": 0.0, "max_lookup_seconds": 0.0}
+        self._flushed = time.monotonic()
+        self._puts = 0
+        self._touched = {}  # key -> last access time, written in batches
+
+    def get(self, kind, inputs):
+        started = time.perf_counter()
+        key = cache_key(kind, inputs)
+        with self._lock:
+            row = self._db.execute("SELECT value, writer FROM results WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self._touched[key] = time.time()
+            elapsed = time.perf_counter() - started
+            counters = self._counters
+            counters["lookups"] += 1
+            counters["lookup_seconds"] += elapsed
+            counters["max_lookup_seconds"] = max(counters["max_lookup_seconds"], elapsed)
+            if row is not None:
+                counters["hits"] += 1
+                counters["cross_replica_hits"] += row[1] != self.replica_id
+            self._maybe_flush_metrics(force=len(self._touched) >= TOUCH_FLUSH_ENTRIES)
+        return None if row is None else json.loads(row[0])
+
+    def put(self, kind, inputs, value):
+        key = cache_key(kind, inputs)
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)",
+                             (key, RULESET_VERSION, json.dumps(value), self.replica_id, time.time()))
+            self._evict()
+
+    def calculate(self, client, compute=calculate_client):
+        """calculate_client through the shared cache.
+
+        Every caller (full app, lite app, batch) shares the "client" entries. On a miss
+        compute(client_inputs(client)) must return a calculate_client-shaped result;
+        tds_paid and net_tax are filled in from this client, not the cached entry.
+        """
+        inputs = client_inputs(client)
+        result = self.get("client", inputs)
+        if result is None:
+            result = {name: value for name, value in compute(inputs).items() if name not in ("tds_paid", "net_tax")}
+            self.put("client", inputs, result)
+        tds_paid = float(client.get("tds_paid") or 0)
+        return {**result, "tds_paid": tds_paid, "net_tax": result["total_tax"] - tds_paid}
+
+    def _evict(self):
+        # Only count every 1% of the cap worth of puts, and evict 10% of the cap at
+        # a time, so most puts don't pay for eviction
+        self._puts += 1
+        if self._puts % max(1, self.max_entries // 100):
+            return
+        count = self._db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        if count > self.max_entries:
+            self._flush_touched()  # so recently read entries are not evicted
+            excess = count - self.max_entries + self.max_entries // 10
+            self._db.execute("""DELETE FROM results WHERE key IN (
+                SELECT key FROM results ORDER BY last_access LIMIT ?)""", (excess,))
+
+    def _flush_touched(self):
+        if not self._touched:
+            return
+        touched, self._touched = self._touched, {}
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            self._db.executemany("UPDATE results SET last_access = max(last_access, ?) WHERE key = ?",
+                                 [(accessed, key) for key, accessed in touched.items()])
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        self._db.execute("COMMIT")
+
+    def _maybe_flush_metrics(self, force=False):
+        """Write pending last-access times and this process's counters, at most every
+        METRICS_FLUSH_SECONDS unless forced"""
+        if not force and time.monotonic() - self._flushed < METRICS_FLUSH_SECONDS:
+            return
+        self._flush_touched()
+        counters = self._counters
+        self._db.execute("INSERT OR REPLACE INTO metrics VALUES (?, ?, ?, ?, ?, ?, ?)", (
+            self.replica_id, counters["lookups"], counters["hits"], counters["cross_replica_hits"],
+            counters["lookup_seconds"], counters["max_lookup_seconds"], time.time()))
+        self._flushed = time.monotonic()
+
+    def metrics(self):
+        """Hit rates and lookup latency for this process and for all replicas together"""
+        with self._lock:
+            self._maybe_flush_metrics(force=True)
+            rows = self._db.execute("SELECT lookups, hits, cross_replica_hits, lookup_seconds, max_lookup_seconds FROM metrics").fetchall()
+            entries = self._db.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+        def summarize(lookups, hits, cross_hits, seconds, max_seconds):
+            return {
+                "lookups": lookups,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "cross_replica_hit_rate": cross_hits / lookups if lookups else 0.0,
+                "mean_lookup_ms": seconds / lookups * 1000 if lookups else 0.0,
+                "max_lookup_ms": max_seconds * 1000,
+            }
+
+        counters = self._counters
+        totals = [sum(row[i] for row in rows) for i in range(4)] + [max((row[4] for row in rows), default=0.0)]
+        return {
+            "replica": summarize(counters["lookups"], counters["hits"], counters["cross_replica_hits"],
+                                 counters["lookup_seconds"], counters["max_lookup_seconds"]),
+            "all_replicas": {**summarize(*totals), "replicas": len(rows)},
+            "entries": entries,
+            "ruleset_version": RULESET_VERSION,
+        }
+
+    def clear(self):
+        with self._lock:
+            self._touched = {}
+            self._db.execute("DELETE FROM results")
+            self._db.execute("DELETE FROM metrics")
+
+    def close(self):
+        with self._lock:
+            self._maybe_flush_metrics(force=True)
+            self._db.close()
@@ -0,0 +1,272 @@
+# COLUMNAR RESULT STORE
+#
+# Batch results are written one column after another into a single file with a
+# small JSON schema header, so dashboards can memory-map the file and read just
+# the columns they need without parsing anything. Rows are also indexed by
+# (regime, income band), with per-group count/sum/min/max kept in the header so
+# the common aggregates never touch the column data at all.
+#
+# File layout (all offsets 8-byte aligned):
+#   b"APMHCOL1" | uint64 header length | JSON header | column data | row-id index
+
+import json
+import mmap
+import os
+import shutil
+import struct
+import sys
+import tempfile
+from array import array
+from bisect import bisect_left
+
+from tax_engine import calculate_client
+
+try:
+    import numpy as np
+except ImportError:  # numpy views are optional, memoryviews always work
+    np = None
+
+MAGIC = b"APMHCOL1"
+FORMAT_VERSION = 2
+FLUSH_ROWS = 65536
+ROW_ID_TYPE = "I"  # typecode of the row-id index entries
+
+# (column, array typecode) - regime is stored as 0 = old, 1 = new
+COLUMNS = [
+    ("regime", "B"),
+    ("total_income", "d"),
+    ("stcg", "d"),
+    ("ltcg", "d"),
+    ("total_taxable_income", "d"),
+    ("base_tax", "d"),
+    ("surcharge", "d"),
+    ("cess", "d"),
+    ("rebate_applied", "d"),
+    ("marginal_relief_applied", "d"),
+    ("total_tax", "d"),
+    ("net_tax", "d"),
+]
+REGIMES = ["old", "new"]
+
+# Upper edges of the income bands (total taxable income) used by the index:
+# rebate limits, marginal relief band, top slab and surcharge thresholds
+BAND_EDGES = [500000, 1200000, 1260000, 2400000, 5000000, 10000000, 20000000, 50000000]
+
+def income_band(total_taxable_income):
+    """Index of the band an income falls into (band i covers up to BAND_EDGES[i])"""
+    return bisect_left(BAND_EDGES, total_taxable_income)
+
+def band_label(band):
+    lower = "0" if band == 0 else f"{BAND_EDGES[band - 1]:,}"
+    upper = f"{BAND_EDGES[band]:,}" if band < len(BAND_EDGES) else "above"
+    return f"₹{lower} - ₹{upper}" if band < len(BAND_EDGES) else f"Above ₹{lower}"
+
+def _align(offset):
+    return (offset + 7) & ~7
+
+class ResultWriter:
+    """Streams result rows into a columnar file; memory use is bounded by FLUSH_ROWS"""
+
+    def __init__(self, path):
+        self.path = path
+        self.rows = 0
+        self._spill_dir = tempfile.mkdtemp(prefix="apmh_results_")
+        self._buffers = {name: array(code) for name, code in COLUMNS}
+        self._spills = {name: open(os.path.join(self._spill_dir, name), "wb") for name, _ in COLUMNS}
+        self._groups = {}  # (regime, band) -> {"rows": array, "spill": file, "count", "stats"}
+
+    def append(self, result):
+        """Add one row - a dict as returned by calculate_client"""
+        regime = REGIMES.index(result["regime"])
+        group = self._group(regime, income_band(result["total_taxable_income"]))
+        group["rows"].append(self.rows)
+        group["count"] += 1
+
+        for name, _ in COLUMNS:
+            value = regime if name == "regime" else float(result[name])
+            self._buffers[name].append(value)
+            stats = group["stats"][name]
+            stats[0] += value
+            stats[1] = min(stats[1], value)
+            stats[2] = max(stats[2], value)
+
+        self.rows += 1
+        if self.rows % FLUSH_ROWS == 0:
+            self._flush()
+
+    def _group(self, regime, band):
+        key = (regime, band)
+        if key not in self._groups:
+            self._groups[key] = {
+                "rows": array(ROW_ID_TYPE),
+                "spill": open(os.path.join(self._spill_dir, f"index_{regime}_{band}"), "wb"),
+                "count": 0,
+                "stats": {name: [0.0, float("inf"), float("-inf")] for name, _ in COLUMNS},
+            }
+        return self._groups[key]
+
+    def _flush(self):
+        for name, buffer in self._buffers.items():
+            buffer.tofile(self._spills[name])
+            del buffer[:]
+        for group in self._groups.values():
+            group["rows"].tofile(group["spill"])
+            del group["rows"][:]
+
+    def close(self):
+        """Assemble header, columns and index into the final file (atomically replaced)"""
+        self._flush()
+        for spill in self._spills.values():
+            spill.close()
+        for group in self._groups.values():
+            group["spill"].close()
+
+        columns, offset = [], 0
+        for name, code in COLUMNS:
+            length = self.rows * array(code).itemsize
+            columns.append({"name": name, "type": code, "offset": offset, "length": length})
+            offset = _align(offset + length)
+
+        index = []
+        for (regime, band), group in sorted(self._groups.items()):
+            index.append({
+                "regime": REGIMES[regime],
+                "band": band,
+                "offset": offset,
+                "count": group["count"],
+                "stats": {name: {"sum": s[0], "min": s[1], "max": s[2]} for name, s in group["stats"].items()},
+            })
+            offset = _align(offset + group["count"] * array(ROW_ID_TYPE).itemsize)
+
+        header = json.dumps({
+            "version": FORMAT_VERSION,
+            "byte_order": sys.byteorder,
+            "row_id_type": ROW_ID_TYPE,
+            "row_id_size": array(ROW_ID_TYPE).itemsize,
+            "rows": self.rows,
+            "columns": columns,
+            "band_edges": BAND_EDGES,
+            "index": index,
+        }).encode()
+        data_start = _align(len(MAGIC) + 8 + len(header))
+
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "wb") as out:
+            out.write(MAGIC + struct.pack("<Q", len(header)) + header)
+            sources = [os.path.join(self._spill_dir, name) for name, _ in COLUMNS]
+            sources += [os.path.join(self._spill_dir, f"index_{REGIMES.index(entry['regime'])}_{entry['band']}") for entry in index]
+            targets = [column["offset"] for column in columns] + [entry["offset"] for entry in index]
+            for source, target in zip(sources, targets):
+                out.write(b"\0" * (data_start + target - out.tell()))
+                with open(source, "rb") as spill:
+                    shutil.copyfileobj(spill, out)
+        os.replace(temp_path, self.path)
+        shutil.rmtree(self._spill_dir, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            shutil.rmtree(self._spill_dir, ignore_errors=True)
+
+def write_results(path, clients, cache=None):
+    """Calculate every client and write the results; returns the row count.
+
+    Pass a result_cache.SharedResultCache to reuse (and share) results already
+    computed by the app replicas or other batch workers.
+    """
+    calculate = cache.calculate if cache is not None else calculate_client
+    with ResultWriter(path) as writer:
+        for client in clients:
+            writer.append(calculate(client))
+    return writer.rows
+
+class ResultSet:
+    """Read-only, memory-mapped view of a result file.
+
+    column(), row_ids() and array() return views straight into the mapping - nothing
+    is copied until they are indexed. Views may outlive close(): the file is closed
+    at once, and the mapping is unmapped when the last view is released.
+    """
+
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not an APMH result file")
+        (header_length,) = struct.unpack_from("<Q", self._map, len(MAGIC))
+        header_start = len(MAGIC) + 8
+        self.header = json.loads(self._map[header_start:header_start + header_length])
+        if self.header["version"] != FORMAT_VERSION:
+            self.close()
+            raise ValueError(f"Unsupported result file version: {self.header['version']}")
+        if self.header["byte_order"] != sys.byteorder or array(self.header["row_id_type"]).itemsize != self.header["row_id_size"]:
+            self.close()
+            raise ValueError(f"{path} was written on a {self.header['byte_order']}-endian machine with "
+                             f"{self.header['row_id_size']}-byte row ids and can't be mapped here")
+        self._data_start = _align(header_start + header_length)
+        self._columns = {column["name"]: column for column in self.header["columns"]}
+        self.rows = self.header["rows"]
+
+    @property
+    def columns(self):
+        return list(self._columns)
+
+    def column(self, name):
+        """Zero-copy memoryview of a whole column"""
+        column = self._columns[name]
+        start = self._data_start + column["offset"]
+        return memoryview(self._map)[start:start + column["length"]].cast(column["type"])
+
+    def array(self, name):
+        """Zero-copy numpy array of a whole column (needs numpy)"""
+        if np is None:
+            raise ImportError("numpy is required for ResultSet.array(), use column() instead")
+        column = self._columns[name]
+        return np.frombuffer(self._map, dtype=np.dtype(column["type"]), count=self.rows,
+                             offset=self._data_start + column["offset"])
+
+    def _groups(self, regime=None, band=None):
+        return [entry for entry in self.header["index"]
+                if (regime is None or entry["regime"] == regime) and (band is None or entry["band"] == band)]
+
+    def row_ids(self, regime=None, band=None):
+        """Row numbers matching the filter, as one memoryview per index group"""
+        views = []
+        for entry in self._groups(regime, band):
+            start = self._data_start + entry["offset"]
+            length = entry["count"] * self.header["row_id_size"]
+            views.append(memoryview(self._map)[start:start + length].cast(self.header["row_id_type"]))
+        return views
+
+    def aggregate(self, name, regime=None, band=None):
+        """count/sum/min/max/mean of a column for a regime and/or income band, from the header"""
+        groups = [entry for entry in self._groups(regime, band) if entry["count"]]
+        count = sum(entry["count"] for entry in groups)
+        total = sum(entry["stats"][name]["sum"] for entry in groups)
+        return {
+            "count": count,
+            "sum": total,
+            "min": min((entry["stats"][name]["min"] for entry in groups), default=0.0),
+            "max": max((entry["stats"][name]["max"] for entry in groups), default=0.0),
+            "mean": total / count if count else 0.0,
+        }
+
+    def close(self):
+        if self._map is not None:
+            try:
+                self._map.close()
+            except BufferError:
+                pass  # views still exported - the mapping goes when the last one is released
+            self._map = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
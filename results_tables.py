@@ -0,0 +1,78 @@
+# RESULTS SECTION TABLES
+#
+# The breakdown tables under the calculator's results (house property, new regime
+# exemption utilization, detailed tax breakdown) and the notes shown with them,
+# built once from the inputs and a calculate_client-shaped result. The app renders
+# them with Streamlit and report_generator writes them into each client's HTML
+# sheet and CSV appendix, so both show the same rows, notes and order.
+
+from tax_engine import NEW_REGIME_BASIC_EXEMPTION, allocate_basic_exemption
+
+def _money(amount):
+    return f"₹{amount:,.0f}"
+
+def results_tables(inputs, result):
+    """The results-section tables as (title, notes, header, rows), in page order.
+
+    notes are (level, text) pairs - level is "info", "success" or "warning" - shown
+    above the table.
+    """
+    total_tax = result["total_tax"]
+    tables = []
+
+    house_income, house_loan_interest = inputs["house_income"], inputs["house_loan_interest"]
+    if house_income > 0 or house_loan_interest > 0:
+        net_house_income = (house_income * 0.70) - house_loan_interest
+        notes = [("info", "Note: House property shows loss (can be set off against other income as per IT rules)")] if net_house_income < 0 else []
+        tables.append(("House Property Income Breakdown", notes, ["Component", "Amount (₹)"], [
+            ["Gross Annual Value", _money(house_income)],
+            ["Less: 30% Standard Deduction", _money(house_income * 0.30)],
+            ["Less: Interest on Loan", _money(house_loan_interest)],
+            ["Net House Property Income", _money(max(0, net_house_income))],
+        ]))
+
+    stcg, ltcg = result["stcg"], result["ltcg"]
+    total_income, total_taxable_income = result["total_income"], result["total_taxable_income"]
+    if result["regime"] == "new" and (stcg > 0 or ltcg > 0 or total_income > 0):
+        # Same allocation the engine used
+        allocation = allocate_basic_exemption(total_income, stcg, ltcg)
+        notes = [("info", f"LTCG exemption of ₹1,25,000 applied to {_money(ltcg)} - "
+                          f"taxable LTCG {_money(allocation['taxable_ltcg_after_exemption'])}")]
+        if allocation["other_exemption"] >= NEW_REGIME_BASIC_EXEMPTION:
+            notes.append(("info", "Basic exemption fully used by other income - slabs apply from ₹4L-8L at 5%"))
+        if 1200000 < total_taxable_income <= 1260000:
+            notes.append(("success", f"Marginal relief: income {_money(total_taxable_income)} is within ₹12,00,000 - ₹12,60,000, "
+                                     f"tax limited to {_money(total_taxable_income - 1200000)} (the excess over ₹12L), "
+                                     f"relief {_money(result['marginal_relief_applied'])}"))
+        elif total_taxable_income <= 1200000:
+            notes.append(("info", "Income ≤ ₹12L: rebate of ₹60K applied instead of marginal relief"))
+        else:
+            notes.append(("warning", "Income > ₹12.6L: No marginal relief applicable"))
+        tables.append(("New Regime - Detailed Calculation Breakdown", notes, ["Income Type", "Amount", "Exemption Used", "Taxable Amount"], [
+            ["Other Income", _money(total_income), _money(allocation["other_exemption"]), _money(allocation["final_taxable_other"])],
+            ["STCG", _money(stcg), _money(allocation["stcg_exemption"]), _money(allocation["final_taxable_stcg"])],
+            ["LTCG (after ₹1.25L exemption)", _money(allocation["taxable_ltcg_after_exemption"]),
+             _money(allocation["ltcg_exemption"]), _money(allocation["final_taxable_ltcg"])],
+            ["Total Used", "-", _money(allocation["other_exemption"] + allocation["stcg_exemption"] + allocation["ltcg_exemption"]), "-"],
+        ]))
+
+    def share(amount):
+        return f"{amount / total_tax * 100:.1f}%" if total_tax > 0 else "0%"
+
+    rows = [
+        ["Base Tax", f"{result['base_tax']:,.2f}", share(result["base_tax"])],
+        ["Surcharge", f"{result['surcharge']:,.2f}", share(result["surcharge"])],
+        ["Cess", f"{result['cess']:,.2f}", share(result["cess"])],
+    ]
+    # Reliefs already taken off Base Tax, listed just before the total
+    if result["rebate_applied"] > 0:
+        rows.append(["Less: Rebate Applied", f"({result['rebate_applied']:,.2f})", "-"])
+    if result["marginal_relief_applied"] > 0:
+        rows.append(["Less: Marginal Relief", f"({result['marginal_relief_applied']:,.2f})", "-"])
+    rows += [
+        ["Total Tax", f"{total_tax:,.2f}", "100%"],
+        ["TDS Paid", f"{result['tds_paid']:,.2f}", "-"],
+        ["Net Amount", f"{abs(result['net_tax']):,.2f}", "-"],
+    ]
+    tables.append(("Detailed Tax Breakdown", [], ["Component", "Amount (₹)", "Percentage"], rows))
+    return tables
@@ -0,0 +1,170 @@
+# SHARED STATIC ASSETS
+#
+# Everything on the page that is the same for every user: the CSS, the sidebar slab
+# text and the reference tables. Python imports this module once per server process,
+# so all Streamlit sessions reference these same objects instead of rebuilding them
+# on every rerun. Treat them as read-only - never modify the tables in place.
+#
+# lite_budget.measure() on the full app, memory retained per added session after
+# one calculation (three runs each):
+#   before sharing (ca8f74b):                       385-387 KiB
+#   after sharing  (12330f0):                       380-382 KiB
+#   with calc_graph, last_result, imported_summary: 393-397 KiB
+#   tables passed as plain dicts/lists (no pandas): 348-358 KiB  (~10% less)
+# What remains is mostly the Plotly figures. session_memory_report() puts the
+# measured figure next to the session_state keys for a live session.
+
+import sys
+
+# Advanced CSS styling with light blue theme
+APP_CSS = """
+    <style>
+    .main {
+        padding: 0rem 1rem;
+    }
+    .stApp {
+        background: linear-gradient(135deg, #ADD8E6 0%, #87CEFA 100%);
+    }
+    .main-header {
+        background: linear-gradient(90deg, #4169E1, #6495ED);
+        padding: 2rem;
+        border-radius: 10px;
+        margin-bottom: 2rem;
+        text-align: center;
+        color: white;
+        box-shadow: 0 4px 6px rgba(0,0,0,0.1);
+    }
+    .input-container {
+        background: white;
+        padding: 2rem;
+        border-radius: 15px;
+        box-shadow: 0 8px 16px rgba(0,0,0,0.1);
+        margin-bottom: 2rem;
+    }
+    .result-container {
+        background: linear-gradient(135deg, #ADD8E6 0%, #87CEFA 100%);
+        padding: 2rem;
+        border-radius: 15px;
+        box-shadow: 0 8px 16px rgba(0,0,0,0.1);
+        color: #191970;
+    }
+    .metric-card {
+        background: white;
+        padding: 1.5rem;
+        border-radius: 10px;
+        box-shadow: 0 4px 8px rgba(0,0,0,0.1);
+        margin: 0.5rem;
+        text-align: center;
+    }
+    .stButton > button {
+        background: linear-gradient(90deg, #4169E1, #6495ED);
+        color: white;
+        border: none;
+        padding: 0.75rem 2rem;
+        border-radius: 25px;
+        font-weight: bold;
+        box-shadow: 0 4px 8px rgba(0,0,0,0.2);
+        transition: all 0.3s ease;
+    }
+    .stButton > button:hover {
+        transform: translateY(-2px);
+        box-shadow: 0 6px 12px rgba(0,0,0,0.3);
+    }
+    .sidebar .sidebar-content {
+        background: linear-gradient(135deg, #ADD8E6 0%, #87CEFA 100%);
+    }
+    </style>
+"""
+
+NEW_REGIME_SLABS_MD = """
+        - **₹0 - 4L:** 0%
+        - **₹4L - 8L:** 5%
+        - **₹8L - 12L:** 10%
+        - **₹12L - 16L:** 15%
+        - **₹16L - 20L:** 20%
+        - **₹20L - 24L:** 25%
+        - **Above ₹24L:** 30%
+        
+        **🆕 Special Benefits:**
+        - **Rebate:** ₹60K for income ≤ ₹12L
+        - **Marginal Relief:** Income ₹12L-₹12.6L
+        - Tax limited to (Income - ₹12L)
+        
+        **CG Exemption Priority:**
+        1. Other income uses ₹4L exemption
+        2. STCG uses remaining exemption
+        3. LTCG (after ₹1.25L) uses last
+        
+        **Tax Rates:** STCG: 20% | LTCG: 12.5%
+        """
+
+OLD_REGIME_SLABS_MD = """
+        **Old Regime:**
+        - **₹0 - 2.5L:** 0%
+        - **₹2.5L - 5L:** 5%
+        - **₹5L - 10L:** 20%
+        - **Above ₹10L:** 30%
+        
+        **Capital Gains:**
+        - **STCG:** 20%
+        - **LTCG:** 12.5% (above ₹1.25L)
+        """
+
+# Marginal Relief demonstration table (column -> values, as st.dataframe takes it)
+DEMO_TABLE = {
+    "Income (₹)": ["11,99,000", "12,01,000", "12,30,000", "12,60,000", "12,61,000"],
+    "Without Relief": ["₹0*", "₹15,000+", "₹45,000+", "₹75,000+", "₹75,300+"],
+    "With Marginal Relief": ["₹0*", "₹1,000", "₹30,000", "₹60,000", "₹75,300"],
+    "Benefit": ["-", "₹14,000 saved", "₹15,000 saved", "₹15,000 saved", "-"]
+}
+
+# Tax calendar
+TAX_DATES_TABLE = {
+    "Date": ["31st July","15th March","15th December", "15th September", "15th June"],
+    "Event": ["ITR Filing Due Date", "Q4 Advance Tax","Q3 Advance Tax", "Q2 Advance Tax", "Q1 Advance Tax"],
+    "Amount": ["Annual Return", "100% of Tax","75% of Tax", "45% of Tax", "15% of Tax"]
+}
+
+SHARED_ASSETS = {
+    "APP_CSS": APP_CSS,
+    "NEW_REGIME_SLABS_MD": NEW_REGIME_SLABS_MD,
+    "OLD_REGIME_SLABS_MD": OLD_REGIME_SLABS_MD,
+    "DEMO_TABLE": DEMO_TABLE,
+    "TAX_DATES_TABLE": TAX_DATES_TABLE,
+}
+
+def deep_size(obj, seen=None):
+    """Approximate bytes held by an object and everything it references"""
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    if hasattr(obj, "memory_usage") and hasattr(obj, "columns"):  # DataFrame
+        return int(obj.memory_usage(deep=True).sum())
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_size(key, seen) + deep_size(value, seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(deep_size(item, seen) for item in obj)
+    elif hasattr(obj, "__dict__"):
+        size += deep_size(vars(obj), seen)
+    return size
+
+def session_memory_report(session_state, measured_bytes):
+    """What one session costs vs the assets all sessions share.
+
+    measured_bytes is lite_budget.measure()["session_bytes"] for the app - the memory
+    a whole added session retains (Streamlit's element tree, figures, widget state).
+    session_state keys are sized within it, shared assets excluded; "other" is the
+    part of the measured figure not held in session_state.
+    """
+    shared_seen = set()
+    shared = {name: deep_size(asset, shared_seen) for name, asset in SHARED_ASSETS.items()}
+    per_key = {str(key): deep_size(value, set(shared_seen)) for key, value in session_state.items()}
+    return {
+        "session_total": measured_bytes,
+        "session_state": per_key,
+        "other": max(0, measured_bytes - sum(per_key.values())),
+        "shared": shared,
+        "shared_total": sum(shared.values()),
+    }
@@ -0,0 +1,357 @@
+# FORM 26AS / AIS STATEMENT IMPORTER
+#
+# Reads locally saved annual statements (JSON, or the text/CSV exports) entry by
+# entry and aggregates them on the fly, so a statement with thousands of entries
+# never has to be loaded whole. Totals per income head map straight onto the
+# calculator inputs (salary, business_income, house_income, other_sources, tds_paid).
+
+import csv
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+CHUNK_SIZE = 64 * 1024  # Bytes read at a time - bounds memory per file
+
+# TDS/TCS section -> calculator income head
+SECTION_HEADS = {
+    "192": "salary",
+    "192A": "other_sources",        # EPF withdrawal
+    "193": "other_sources",         # Interest on securities
+    "194": "other_sources",         # Dividend
+    "194A": "other_sources",        # Interest other than securities
+    "194B": "other_sources",        # Lottery / game winnings
+    "194BB": "other_sources",       # Horse race winnings
+    "194K": "other_sources",        # Mutual fund income
+    "194EE": "other_sources",       # NSS withdrawal
+    "194I": "house_income",         # Rent
+    "194IB": "house_income",        # Rent by individuals / HUF
+    "194C": "business_income",      # Contractors
+    "194D": "business_income",      # Insurance commission
+    "194H": "business_income",      # Commission / brokerage
+    "194J": "business_income",      # Professional / technical fees
+    "194M": "business_income",      # Contract / professional payments by individuals
+    "194O": "business_income",      # E-commerce participants
+}
+
+# AIS information categories (when there is no section code) -> income head
+CATEGORY_HEADS = {
+    "salary": "salary",
+    "rent received": "house_income",
+    "interest from savings bank": "other_sources",
+    "interest from deposit": "other_sources",
+    "interest from others": "other_sources",
+    "dividend": "other_sources",
+    "business receipts": "business_income",
+    "receipt of professional fees": "business_income",
+}
+
+# Column / key aliases seen across 26AS text, AIS CSV and AIS JSON exports
+FIELD_ALIASES = {
+    "section": ["section", "section code", "sectioncode", "tds section"],
+    "category": ["information category", "informationcategory", "information description", "category"],
+    "deductor": ["name of deductor", "deductor name", "deductorname", "information source", "name of collector"],
+    "tan": ["tan of deductor", "tan", "deductortan", "information source tan"],
+    "amount": ["amount paid / credited", "amount paid/credited", "amountpaid", "amount", "reported value", "amount credited"],
+    "tds": ["tax deducted", "tds deducted", "tds deposited", "tax deducted/collected", "taxdeducted", "tds", "total tax"],
+}
+
+# Keys a JSON export may keep its entry list under (normalized, see _normalize)
+ENTRY_KEYS = {"entries", "tds", "tds details", "tdsdetails", "transactions", "transaction details", "ais", "information", "records", "data"}
+
+INPUT_HEADS = ["salary", "business_income", "house_income", "other_sources"]
+
+def _normalize(name):
+    return " ".join(str(name).strip().lower().replace("_", " ").split())
+
+_ALIAS_LOOKUP = {_normalize(alias): field for field, aliases in FIELD_ALIASES.items() for alias in aliases}
+
+def _amount(value):
+    """Rupee figure of a cell; blank is 0, anything else unparseable raises ValueError"""
+    if value is None or value == "":
+        return 0.0
+    if isinstance(value, (int, float)):
+        return float(value)
+    return float(str(value).replace(",", "").replace("₹", "").strip() or 0)
+
+def _is_number(cell):
+    try:
+        _amount(cell)
+    except ValueError:
+        return False
+    return bool(cell)
+
+def _income_head(section, category):
+    section = str(section or "").strip().upper()
+    if section in SECTION_HEADS:
+        return SECTION_HEADS[section]
+    return CATEGORY_HEADS.get(_normalize(category or ""), "unclassified")
+
+class StatementAggregate:
+    """Running totals for one statement, updated one entry at a time"""
+
+    def __init__(self, source=""):
+        self.source = source
+        self.entries = 0
+        self.skipped = 0
+        self.by_head = {}       # head -> {"amount", "tds"}
+        self.by_deductor = {}   # (tan, name) -> {"amount", "tds", "head"}
+
+    def add(self, entry):
+        fields = {}
+        for key, value in entry.items():
+            field = _ALIAS_LOOKUP.get(_normalize(key))
+            if field and field not in fields:
+                fields[field] = value
+        if "amount" not in fields and "tds" not in fields:
+            self.skipped += 1
+            return
+        try:
+            amount, tds = _amount(fields.get("amount")), _amount(fields.get("tds"))
+        except ValueError:
+            self.skipped += 1
+            return
+
+        head = _income_head(fields.get("section"), fields.get("category"))
+        totals = self.by_head.setdefault(head, {"amount": 0.0, "tds": 0.0})
+        totals["amount"] += amount
+        totals["tds"] += tds
+
+        deductor = (str(fields.get("tan") or "").strip(), str(fields.get("deductor") or "").strip())
+        totals = self.by_deductor.setdefault(deductor, {"amount": 0.0, "tds": 0.0, "head": head})
+        totals["amount"] += amount
+        totals["tds"] += tds
+        self.entries += 1
+
+    def calculator_inputs(self):
+        """Totals in the shape of the calculator form inputs"""
+        inputs = {head: round(self.by_head.get(head, {}).get("amount", 0.0), 2) for head in INPUT_HEADS}
+        inputs["tds_paid"] = round(sum(totals["tds"] for totals in self.by_head.values()), 2)
+        return inputs
+
+    def summary(self):
+        return {
+            "source": self.source,
+            "entries": self.entries,
+            "skipped": self.skipped,
+            "inputs": self.calculator_inputs(),
+            "by_head": self.by_head,
+            "by_deductor": {f"{tan} {name}".strip(): totals for (tan, name), totals in self.by_deductor.items()},
+        }
+
+def iter_json_entries(stream):
+    """Yield the entry objects of a JSON statement, one at a time.
+
+    Works for a top-level list and for wrappers like {"header": {...}, "entries": [...]},
+    where the entry list is found by its key (ENTRY_KEYS). Other members are decoded
+    and skipped. Only the current chunk and the value being decoded are held in memory.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    eof = False
+
+    def refill():
+        nonlocal buffer, pos, eof
+        chunk = stream.read(CHUNK_SIZE)
+        eof = not chunk
+        buffer = buffer[pos:] + chunk
+        pos = 0
+
+    def next_char(separators=""):
+        """Skip whitespace and separators, return the next character ("" at the end)"""
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and (buffer[pos].isspace() or buffer[pos] in separators):
+                pos += 1
+            if pos < len(buffer):
+                return buffer[pos]
+            if eof:
+                return ""
+            refill()
+
+    def decode():
+        nonlocal pos
+        while True:
+            try:
+                value, pos = decoder.raw_decode(buffer, pos)
+                return value
+            except json.JSONDecodeError:
+                if eof:
+                    raise ValueError("Truncated or invalid JSON statement")
+                refill()
+
+    first = next_char()
+    if first == "{":
+        pos += 1
+        while True:
+            if next_char(",") != '"':
+                raise ValueError(f"No entry list found - expected a list under one of: {', '.join(sorted(ENTRY_KEYS))}")
+            key = decode()
+            if next_char(":") == "[" and _normalize(key) in ENTRY_KEYS:
+                break
+            decode()  # some other member (header, assessee details...) - skip it
+    elif first != "[":
+        raise ValueError("Not a JSON statement")
+    pos += 1
+
+    while True:
+        char = next_char(",")
+        if char == "]":
+            return
+        if not char:
+            raise ValueError("Truncated or invalid JSON statement")
+        entry = decode()
+        if isinstance(entry, dict):
+            yield entry
+
+def iter_text_entries(stream):
+    """Yield rows of a text/CSV export as dicts keyed by the most recent header row.
+
+    26AS text exports are "^" separated and repeat a header per part/deductor. A row
+    with no numbers in it is a header or a part title: it starts a new header when it
+    names two known columns or an amount/tax column. Anything else (part titles,
+    tables we don't map) drops both the header and the carried deductor, so rows are
+    ignored until the next recognised header. Deductor rows (name / TAN but no amounts) are not
+    entries themselves; their name and TAN are carried into the transaction rows
+    that follow them.
+    """
+    sample = stream.read(CHUNK_SIZE)
+    while not any(char in sample for char in ",^|\t"):  # e.g. a part title opens the file
+        chunk = stream.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        sample += chunk
+    delimiter = max(",^|\t", key=sample.count)
+    lines = _chain_lines(sample, stream)
+
+    header = None
+    deductor = {}
+    for row in csv.reader(lines, delimiter=delimiter):
+        cells = [cell.strip() for cell in row]
+        if not any(cells):
+            continue
+        if not any(_is_number(cell) for cell in cells):
+            known = [_ALIAS_LOOKUP.get(_normalize(cell)) for cell in cells]
+            recognised = len(list(filter(None, known))) >= 2 or {"amount", "tds"} & set(known)
+            if not recognised:
+                header, deductor = None, {}
+            else:
+                header = cells
+            continue
+        if not header:
+            continue
+        entry = dict(zip(header, cells))
+        fields = {key: _ALIAS_LOOKUP.get(_normalize(key)) for key, value in entry.items() if value}
+        identifies = {key for key, field in fields.items() if field in ("deductor", "tan")}
+        if identifies and not set(fields.values()) & {"amount", "tds"}:
+            deductor = {key: entry[key] for key in identifies}
+        elif identifies:
+            yield entry
+        else:
+            yield {**{key: value for key, value in entry.items() if key not in deductor}, **deductor}
+
+def _chain_lines(sample, stream):
+    pending = sample
+    while True:
+        *complete, pending = pending.split("\n")
+        yield from (line + "\n" for line in complete)
+        chunk = stream.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        pending += chunk
+    if pending:
+        yield pending
+
+def import_statement(source, name=None):
+    """Parse one statement (path or binary file object) into a StatementAggregate"""
+    if isinstance(source, (str, os.PathLike)):
+        name = name or os.fspath(source)
+        with open(source, "rb") as handle:
+            return import_statement(handle, name)
+
+    name = name or getattr(source, "name", "")
+    stream = io.TextIOWrapper(source, encoding="utf-8-sig", errors="replace", newline="")
+    try:
+        first = stream.read(1)
+        while first and first.isspace():
+            first = stream.read(1)
+        aggregate = StatementAggregate(name)
+        rest = _Prefixed(first, stream)
+        entries = iter_json_entries(rest) if first and first in "[{" else iter_text_entries(rest)
+        for entry in entries:
+            aggregate.add(entry)
+        if not aggregate.entries:
+            # Never hand back all-zero inputs - the app would overwrite what the user typed
+            raise ValueError(f"No income or TDS entries found in {name or 'statement'}")
+        return aggregate
+    finally:
+        stream.detach()
+
+class _Prefixed:
+    """Text stream with already-consumed characters pushed back in front"""
+
+    def __init__(self, prefix, stream):
+        self.prefix = prefix
+        self.stream = stream
+
+    def read(self, size=-1):
+        prefix, self.prefix = self.prefix, ""
+        return prefix + self.stream.read(size)
+
+def _import_file_summary(path):
+    started = time.perf_counter()
+    try:
+        summary = import_statement(path).summary()
+    except (OSError, ValueError) as error:
+        summary = {"source": path, "error": str(error), "entries": 0}
+    summary["bytes"] = os.path.getsize(path)
+    summary["seconds"] = time.perf_counter() - started
+    return summary
+
+def import_folder(folder, workers=None, extensions=(".json", ".txt", ".csv")):
+    """Import every statement in a folder, yielding one summary per file as it finishes.
+
+    Files are parsed in a process pool; each worker holds one file's running totals
+    at a time. The last item yielded is {"throughput": {...}} with overall stats.
+    """
+    paths = sorted(
+        os.path.join(folder, filename) for filename in os.listdir(folder)
+        if filename.lower().endswith(extensions)
+    )
+    started = time.perf_counter()
+    files = entries = size = errors = 0
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for summary in pool.map(_import_file_summary, paths, chunksize=16):
+            files += 1
+            entries += summary["entries"]
+            size += summary["bytes"]
+            errors += "error" in summary
+            yield summary
+
+    elapsed = max(time.perf_counter() - started, 1e-9)
+    yield {"throughput": {
+        "files": files,
+        "errors": errors,
+        "entries": entries,
+        "seconds": round(elapsed, 3),
+        "files_per_second": round(files / elapsed, 1),
+        "entries_per_second": round(entries / elapsed, 1),
+        "mb_per_second": round(size / elapsed / 1e6, 2),
+    }}
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        sys.exit("Usage: python statement_import.py <folder of statements>")
+    for result in import_folder(sys.argv[1]):
+        if "throughput" in result:
+            stats = result["throughput"]
+            print(f"{stats['files']} files ({stats['errors']} errors), {stats['entries']} entries in {stats['seconds']}s "
+                  f"- {stats['entries_per_second']:,.0f} entries/s, {stats['mb_per_second']} MB/s")
+        elif "error" in result:
+            print(f"{result['source']}: ERROR {result['error']}")
+        else:
+            print(f"{result['source']}: {result['entries']} entries -> {result['inputs']}")
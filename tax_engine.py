@@ -0,0 +1,283 @@
+# TAX CALCULATION FUNCTIONS (Final Corrected Version with Marginal Relief)
+
+try:
+    import numpy as np
+except ImportError:  # numpy is only needed to run the building blocks on arrays
+    np = None
+
+_ARRAY = np.ndarray if np is not None else ()
+
+# OLD REGIME DEDUCTION HEADS (Chapter VI-A) with statutory caps
+# None = no fixed statutory amount (limited by the client's eligibility instead)
+DEDUCTION_CAPS = {
+    "80C": 150000,          # PPF, ELSS, LIC, principal repayment etc.
+    "80CCD(1B)": 50000,     # Additional NPS contribution
+    "80D": 25000,           # Medical insurance - self & family
+    "80D (Parents)": 50000, # Medical insurance - senior citizen parents
+    "HRA": None,            # House rent allowance exemption
+    "LTA": None,            # Leave travel allowance exemption
+}
+
+# NEW REGIME TAX SLABS FOR FY 2024-25 (built once, shared by every call and session)
+NEW_REGIME_SLABS = (
+    (400000, 0.00),    # 0 to 4L: 0%
+    (400000, 0.05),    # 4L to 8L: 5%
+    (400000, 0.10),    # 8L to 12L: 10%
+    (400000, 0.15),    # 12L to 16L: 15%
+    (400000, 0.20),    # 16L to 20L: 20%
+    (400000, 0.25),    # 20L to 24L: 25%
+    (float('inf'), 0.30)  # Above 24L: 30%
+)
+
+# Element-wise helpers: numpy's for arrays, the builtins (same results) for numbers,
+# so every rule below is written once and serves both calculate_client and the
+# vectorized golden corpus engine
+
+def _pick(condition, a, b):
+    return a if condition else b
+
+_NUMBER_OPS = (min, max, _pick)
+_ARRAY_OPS = (np.minimum, np.maximum, np.where) if np is not None else None
+
+def _elementwise(*values):
+    """(minimum, maximum, where) suited to the given amounts"""
+    for value in values:
+        if isinstance(value, _ARRAY):
+            return _ARRAY_OPS
+    return _NUMBER_OPS
+
+def _any(condition):
+    return bool(condition.any()) if isinstance(condition, _ARRAY) else bool(condition)
+
+def round2(value):
+    """round(value, 2); for numpy arrays element-wise, exactly as Python rounds.
+
+    np.round scales by 100 first, which can land the wrong side of a half-paisa;
+    the few values that close to a tie are rounded by Python instead.
+    """
+    if not isinstance(value, _ARRAY):
+        return round(value, 2)
+    value = value.astype(np.float64)
+    scaled = value * 100
+    rounded = np.rint(scaled) / 100
+    near_tie = np.abs(np.abs(scaled - np.trunc(scaled)) - 0.5) < 1e-6
+    if near_tie.any():
+        rounded[near_tie] = [round(item, 2) for item in value[near_tie].tolist()]
+    return rounded
+
+def apply_deduction_caps(deductions):
+    """Cap each claimed deduction at its statutory limit, returns (capped dict, total)"""
+    capped = {}
+    for head, amount in (deductions or {}).items():
+        if head not in DEDUCTION_CAPS:
+            raise ValueError(f"Unknown deduction head: {head}")
+        minimum, maximum, _ = _elementwise(amount)
+        cap = DEDUCTION_CAPS[head]
+        amount = maximum(0, amount)
+        capped[head] = amount if cap is None else minimum(amount, cap)
+    return capped, sum(capped.values())
+
+def calculate_total_income(regime, salary, business_income, house_income, other_sources, house_loan_interest=0):
+    minimum, maximum, where = _elementwise(salary, business_income, house_income, other_sources, house_loan_interest)
+
+    # Salary – Apply standard deduction
+    salary = salary - (75000 if regime == 'new' else 50000)
+    # House Property – Apply 30% standard deduction THEN subtract loan interest
+    house_income = house_income * 0.70
+    house_income = house_income - house_loan_interest  # Deduct interest on house property loan
+    # Total income excluding capital gains
+    total = maximum(0, salary) + maximum(0, business_income) + maximum(0, house_income) + maximum(0, other_sources)
+    return total
+
+def calculate_surcharge_rate(total_income, regime, capital_gains_income):
+    """Determine surcharge rate based on total income & regime, with CG max 15%"""
+    minimum, maximum, where = _elementwise(total_income, capital_gains_income)
+    rate = where(total_income > 50000000, 0.37 if regime == "old" else 0.25,  # > 5 cr
+           where(total_income > 20000000, 0.25,                                # 2–5 cr
+           where(total_income > 10000000, 0.15,                                # 1–2 cr
+           where(total_income > 5000000, 0.10, 0))))                           # 50L–1cr
+    # Capital gains surcharge cap at 15%
+    return where((capital_gains_income > 0) & (rate > 0.15), 0.15, rate)
+
+# Rebate u/s 87A: (income limit, maximum rebate) - on regular income tax only
+REBATE = {"old": (500000, 12500), "new": (1200000, 60000)}
+NEW_REGIME_BASIC_EXEMPTION = 400000
+LTCG_EXEMPTION = 125000
+CESS_RATE = 0.04  # Health & education cess on tax plus surcharge
+
+# The building blocks below are shared by calculate_tax_*_regime, the stages of
+# calc_graph and golden_corpus.current_engine, so the rules exist in exactly one
+# place. Amounts may be numbers or numpy arrays; regime is always one string.
+
+def old_regime_slab_tax(total_income):
+    """Old regime tax on normal income, before rebate"""
+    minimum, maximum, where = _elementwise(total_income)
+    return where(total_income <= 250000, 0,
+           where(total_income <= 500000, (total_income - 250000) * 0.05,
+           where(total_income <= 1000000, 12500 + (total_income - 500000) * 0.2,
+                  112500 + (total_income - 1000000) * 0.3)))
+
+def old_regime_capital_gains_tax(stcg, ltcg):
+    # Capital gains tax (separate calculation)
+    minimum, maximum, where = _elementwise(stcg, ltcg)
+    cg_tax = stcg * 0.20
+    return where(ltcg > LTCG_EXEMPTION, cg_tax + (ltcg - LTCG_EXEMPTION) * 0.125, cg_tax)
+
+def allocate_basic_exemption(total_income, stcg, ltcg):
+    """New regime: ₹1.25L LTCG exemption, then the ₹4L basic exemption to other
+    income, STCG and taxable LTCG in that order"""
+    minimum, maximum, where = _elementwise(total_income, stcg, ltcg)
+    # Step 1: Apply LTCG exemption of ₹1.25L first
+    exempt_ltcg = minimum(ltcg, LTCG_EXEMPTION)
+    taxable_ltcg_after_exemption = maximum(0, ltcg - exempt_ltcg)
+
+    # Step 2: Apply basic exemption in priority order
+    # Priority: 1. Other income, 2. STCG, 3. Taxable LTCG
+    remaining_exemption = NEW_REGIME_BASIC_EXEMPTION
+
+    # Use exemption for other income first
+    other_income_exempted = minimum(total_income, remaining_exemption)
+    remaining_exemption = maximum(0, remaining_exemption - other_income_exempted)
+    taxable_other_income = maximum(0, total_income - other_income_exempted)
+
+    # Use remaining exemption for STCG
+    stcg_exempted = minimum(stcg, remaining_exemption)
+    remaining_exemption = maximum(0, remaining_exemption - stcg_exempted)
+    taxable_stcg = maximum(0, stcg - stcg_exempted)
+
+    # Use remaining exemption for taxable LTCG
+    ltcg_exempted = minimum(taxable_ltcg_after_exemption, remaining_exemption)
+    final_taxable_ltcg = maximum(0, taxable_ltcg_after_exemption - ltcg_exempted)
+
+    return {
+        "taxable_ltcg_after_exemption": taxable_ltcg_after_exemption,
+        "other_exemption": other_income_exempted,
+        "stcg_exemption": stcg_exempted,
+        "ltcg_exemption": ltcg_exempted,
+        "final_taxable_other": taxable_other_income,
+        "final_taxable_stcg": taxable_stcg,
+        "final_taxable_ltcg": final_taxable_ltcg,
+    }
+
+def new_regime_slab_tax(allocation):
+    """New regime tax on the other income left after the basic exemption, before rebate"""
+    minimum, maximum, where = _elementwise(allocation["final_taxable_other"], allocation["other_exemption"])
+    slabs = NEW_REGIME_SLABS
+    regular_tax = 0
+
+    # Slab calculation starts after the basic exemption: whatever of the 0% slab
+    # the exemption did not use is still tax free
+    income_remaining = maximum(0, allocation["final_taxable_other"])
+    remaining_in_first_slab = NEW_REGIME_BASIC_EXEMPTION - allocation["other_exemption"]
+    income_remaining = income_remaining - where(remaining_in_first_slab > 0, minimum(income_remaining, remaining_in_first_slab), 0)
+
+    # Apply slabs starting from 4L-8L (5%), until no row has income left
+    for i in range(1, len(slabs)):
+        if not _any(income_remaining > 0):
+            break
+
+        slab_limit, rate = slabs[i]
+        taxable_in_slab = minimum(income_remaining, slab_limit)
+        regular_tax = regular_tax + taxable_in_slab * rate
+        income_remaining = income_remaining - taxable_in_slab
+    return regular_tax
+
+def new_regime_capital_gains_tax(allocation):
+    return allocation["final_taxable_stcg"] * 0.20 + allocation["final_taxable_ltcg"] * 0.125
+
+def apply_rebate(regular_tax, total_income, regime):
+    """Rebate ONLY on regular income tax (NOT capital gains), returns (rebate, tax after rebate)"""
+    minimum, maximum, where = _elementwise(regular_tax, total_income)
+    limit, most = REBATE[regime]
+    eligible = total_income <= limit
+    rebate_applied = where(eligible, minimum(most, regular_tax), 0)
+    return rebate_applied, where(eligible, maximum(0, regular_tax - rebate_applied), regular_tax)
+
+def apply_marginal_relief(total_tax_before_surcharge, total_taxable_income):
+    """New regime, income between ₹12L and ₹12.6L: tax cannot exceed the excess over
+    ₹12L. Returns (relief, tax after relief)"""
+    minimum, maximum, where = _elementwise(total_tax_before_surcharge, total_taxable_income)
+    marginal_relief_amount = total_taxable_income - 1200000
+    applies = (total_taxable_income > 1200000) & (total_taxable_income <= 1260000) & (total_tax_before_surcharge > marginal_relief_amount)
+    return (where(applies, total_tax_before_surcharge - marginal_relief_amount, 0),
+            where(applies, marginal_relief_amount, total_tax_before_surcharge))
+
+def finalize_tax(total_tax_before_surcharge, surcharge_rate, rebate_applied, marginal_relief_applied):
+    """Surcharge and cess on top, rounded: (base_tax, surcharge, cess, rebate, marginal relief)"""
+    minimum, maximum, where = _elementwise(total_tax_before_surcharge)
+    surcharge = total_tax_before_surcharge * surcharge_rate
+    cess = (total_tax_before_surcharge + surcharge) * CESS_RATE
+    return round2(maximum(total_tax_before_surcharge, 0)), round2(surcharge), round2(cess), round2(rebate_applied), round2(marginal_relief_applied)
+
+def calculate_tax_old_regime(total_income, stcg, ltcg, deductions=None):
+    # Deductions (80C, 80D, HRA, LTA...) reduce normal income only, never capital gains
+    if deductions:
+        _, total_deductions = apply_deduction_caps(deductions)
+        _, maximum, _ = _elementwise(total_income, total_deductions)
+        total_income = maximum(0, total_income - total_deductions)
+
+    tax = old_regime_slab_tax(total_income)
+    cg_tax = old_regime_capital_gains_tax(stcg, ltcg)
+    rebate_applied, tax_after_rebate = apply_rebate(tax, total_income, "old")
+
+    # Total tax = Regular tax (after rebate) + Capital gains tax (no rebate)
+    total_tax_before_surcharge = tax_after_rebate + cg_tax
+    surcharge_rate = calculate_surcharge_rate(total_income + stcg + ltcg, "old", stcg + ltcg)
+    return finalize_tax(total_tax_before_surcharge, surcharge_rate, rebate_applied, 0)
+
+def calculate_tax_new_regime(total_income, stcg, ltcg):
+    allocation = allocate_basic_exemption(total_income, stcg, ltcg)
+    regular_tax = new_regime_slab_tax(allocation)
+    cg_tax = new_regime_capital_gains_tax(allocation)
+    rebate_applied, regular_tax_after_rebate = apply_rebate(regular_tax, total_income, "new")
+
+    # Total tax = Regular tax (after rebate) + Capital gains tax (no rebate)
+    total_tax_before_surcharge = regular_tax_after_rebate + cg_tax
+    total_taxable_income = total_income + stcg + ltcg
+    marginal_relief_applied, total_tax_before_surcharge = apply_marginal_relief(total_tax_before_surcharge, total_taxable_income)
+
+    surcharge_rate = calculate_surcharge_rate(total_taxable_income, "new", stcg + ltcg)
+    return finalize_tax(total_tax_before_surcharge, surcharge_rate, rebate_applied, marginal_relief_applied)
+
+def calculate_client(client):
+    """Full calculation for one client record, as shown in the results section.
+
+    client: dict with "regime" plus any of salary, business_income, house_income,
+    house_loan_interest, other_sources, stcg, ltcg, tds_paid and "deductions".
+    The amounts may also be numpy arrays (one regime per call), which is how
+    golden_corpus runs whole columns through the engine.
+    """
+    regime = client.get("regime", "new")
+    stcg, ltcg = client.get("stcg", 0), client.get("ltcg", 0)
+    total_income = calculate_total_income(
+        regime,
+        client.get("salary", 0),
+        client.get("business_income", 0),
+        client.get("house_income", 0),
+        client.get("other_sources", 0),
+        client.get("house_loan_interest", 0),
+    )
+    if regime == 'old':
+        base_tax, surcharge, cess, rebate_applied, marginal_relief_applied = calculate_tax_old_regime(total_income, stcg, ltcg, client.get("deductions"))
+        _, total_deductions = apply_deduction_caps(client.get("deductions"))
+        _, maximum, _ = _elementwise(total_income, total_deductions)
+        total_income = maximum(0, total_income - total_deductions)
+    else:
+        base_tax, surcharge, cess, rebate_applied, marginal_relief_applied = calculate_tax_new_regime(total_income, stcg, ltcg)
+
+    total_tax = base_tax + surcharge + cess
+    return {
+        "regime": regime,
+        "total_income": total_income,
+        "stcg": stcg,
+        "ltcg": ltcg,
+        "total_taxable_income": total_income + stcg + ltcg,
+        "base_tax": base_tax,
+        "surcharge": surcharge,
+        "cess": cess,
+        "rebate_applied": rebate_applied,
+        "marginal_relief_applied": marginal_relief_applied,
+        "total_tax": total_tax,
+        "tds_paid": client.get("tds_paid", 0),
+        "net_tax": total_tax - client.get("tds_paid", 0),
+    }
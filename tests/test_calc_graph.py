@@ -0,0 +1,38 @@
+import random
+
+from calc_graph import build_tax_graph
+from tax_engine import calculate_client
+
+def test_graph_matches_engine():
+    rng = random.Random(3)
+    for _ in range(5000):
+        client = {
+            "regime": rng.choice(["old", "new"]),
+            "salary": rng.choice([0, rng.randint(0, 3000000), rng.randint(1100000, 1400000)]),
+            "house_income": rng.choice([0, rng.randint(0, 900000)]),
+            "house_loan_interest": rng.choice([0, rng.randint(0, 200000)]),
+            "stcg": rng.choice([0, rng.randint(0, 1500000)]),
+            "ltcg": rng.choice([0, rng.randint(0, 1500000)]),
+            "business_income": rng.choice([0, rng.randint(0, 90000000)]),
+            "tds_paid": rng.randint(0, 100000),
+            "deductions": rng.choice([None, {"80C": rng.randint(0, 200000)}]),
+        }
+        values = build_tax_graph(**client).evaluate()
+        expected = calculate_client(client)
+        assert {name: expected[name] for name in values["tax"]} == values["tax"]
+        assert (values["total_tax"], values["net_tax"]) == (expected["total_tax"], expected["net_tax"])
+
+def test_only_affected_stages_rerun():
+    graph = build_tax_graph(regime="new", salary=500000)
+    graph.evaluate()
+
+    graph.update(tds_paid=1000).evaluate()
+    assert graph.stats["last_computed"] == ["net_tax"]
+
+    # Capital gains leave regular income tax alone, so the rebate is not recomputed
+    graph.update(stcg=1000).evaluate()
+    assert "rebate" not in graph.stats["last_computed"] and "tax" in graph.stats["last_computed"]
+
+    # A salary edit that stays under the rebate limit stops at the tax stage
+    graph.update(salary=600000).evaluate()
+    assert "tax" in graph.stats["last_computed"] and "net_tax" not in graph.stats["last_computed"]
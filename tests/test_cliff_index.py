@@ -0,0 +1,90 @@
+import random
+
+import pytest
+
+from cliff_index import CLIFFS, CliffIndex
+from tax_engine import calculate_client
+
+WITHIN = 40000
+
+def _random_client(rng):
+    regime = rng.choice(["old", "new"])
+    _, measure, threshold = CLIFFS[rng.choice([name for name, (regimes, _, _) in CLIFFS.items() if regime in regimes])]
+    gains = rng.choice([0, 0, rng.randrange(0, 400000, 1000)])
+    stcg = rng.randrange(0, gains + 1, 1000) if gains else 0
+    target = threshold + rng.choice([rng.randrange(-2 * WITHIN, WITHIN), 0, -WITHIN, -WITHIN + 1, rng.uniform(-WITHIN, 0)])
+    normal = max(0, target - (gains if measure == "total_taxable_income" else 0))
+    return {
+        "regime": regime,
+        "business_income": normal,
+        "stcg": stcg,
+        "ltcg": gains - stcg,
+        "other_sources": rng.choice([0, 0, 10000]),
+    }
+
+def _scan(book, cliff, within, regime=None):
+    """near_cliff by brute force: every client, engine call for the crossed income"""
+    regimes, measure, threshold = CLIFFS[cliff]
+    found = []
+    for client_id, result in book.items():
+        if result["regime"] not in regimes or regime not in (None, result["regime"]):
+            continue
+        income = result[measure]
+        if not threshold - within < income <= threshold:
+            continue
+        gap = threshold - income
+        crossed = calculate_client({"regime": result["regime"], "business_income": result["total_income"] + gap + 1,
+                                    "stcg": result["stcg"], "ltcg": result["ltcg"]})
+        found.append({"client_id": client_id, "regime": result["regime"], "income": income, "gap": gap,
+                      "extra_tax": round(crossed["total_tax"] - result["total_tax"], 2)})
+    return sorted(found, key=lambda row: row["client_id"])
+
+def _assert_matches(index, book):
+    for cliff in CLIFFS:
+        for regime in (None, "old", "new"):
+            found = index.near_cliff(cliff, WITHIN, regime)
+            assert [row["extra_tax"] for row in found] == sorted((row["extra_tax"] for row in found), reverse=True)
+            assert sorted(found, key=lambda row: row["client_id"]) == _scan(book, cliff, WITHIN, regime)
+
+@pytest.mark.parametrize("seed", range(4))
+def test_near_cliff_matches_a_linear_scan(seed):
+    rng = random.Random(seed)
+    book = {f"c{i}": calculate_client(_random_client(rng)) for i in range(400)}
+    index = CliffIndex()
+    index.bulk_load(book.items())
+    _assert_matches(index, book)
+
+def test_interval_ends_are_exact():
+    book = {
+        "at": calculate_client({"regime": "new", "business_income": 1200000}),
+        "open_end": calculate_client({"regime": "new", "business_income": 1200000 - WITHIN}),
+        "inside": calculate_client({"regime": "new", "business_income": 1200000 - WITHIN + 1}),
+        "past": calculate_client({"regime": "new", "business_income": 1200001}),
+        "relief_end": calculate_client({"regime": "new", "business_income": 1000000, "ltcg": 260000}),
+    }
+    index = CliffIndex()
+    for client_id, result in book.items():
+        index.upsert(client_id, result)
+    assert {row["client_id"] for row in index.near_cliff("Rebate ₹12L", WITHIN)} == {"at", "inside"}
+    assert [row["client_id"] for row in index.near_cliff("Marginal Relief ₹12.6L", WITHIN)] == ["relief_end"]
+    _assert_matches(index, book)
+
+def test_upserts_move_clients_across_regimes_and_incomes():
+    rng = random.Random(9)
+    book = {f"c{i}": calculate_client(_random_client(rng)) for i in range(200)}
+    index = CliffIndex()
+    index.bulk_load(book.items())
+    for step in range(300):
+        client_id = f"c{rng.randrange(250)}"
+        if rng.random() < 0.15:
+            index.remove(client_id)
+            book.pop(client_id, None)
+            continue
+        client = _random_client(rng)
+        if client_id in book:
+            # Same client, other regime, or moved across the threshold
+            client["regime"] = rng.choice(["old", "new"])
+        book[client_id] = calculate_client(client)
+        index.upsert(client_id, book[client_id])
+    assert len(index) == len(book)
+    _assert_matches(index, book)
@@ -0,0 +1,18 @@
+import pytest
+
+from deduction_optimizer import optimize_deductions
+from tax_engine import calculate_client, calculate_total_income
+
+@pytest.mark.parametrize("house_income", range(10014, 20001, 97))
+def test_claiming_the_allocation_gives_the_reported_liability(house_income):
+    # 70% of house income makes total income fractional, just above the rebate limit
+    total_income = calculate_total_income("old", 600000, 0, house_income, 0)
+    plan = optimize_deductions(total_income, 0, 0, 150000)
+    result = calculate_client({"regime": "old", "salary": 600000, "house_income": house_income,
+                               "deductions": plan["allocation"]})
+    assert result["total_tax"] == pytest.approx(plan["liability_after"], abs=0.01)
+    assert plan["liability_after"] == 0
+
+def test_allocation_is_in_whole_rupees():
+    plan = optimize_deductions(500000.3, 0, 0, 150000)
+    assert plan["allocation"] == {"80C": 1}
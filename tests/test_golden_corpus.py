@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+import tax_engine
+from golden_corpus import REGIONS, build_golden, check_vectorized_engine, diff, generate_corpus
+
+def _incomes(corpus):
+    """Normal income (after deductions) and total taxable income per row, as tax_engine sees them"""
+    is_new = corpus["regime"] == 1
+    house = np.maximum(0, corpus["house_income"] * 0.70 - corpus["house_loan_interest"])
+    normal = (np.maximum(0, corpus["salary"] - np.where(is_new, 75000, 50000))
+              + corpus["business_income"] + house + corpus["other_sources"])
+    normal = np.where(is_new, normal, np.maximum(0, normal - np.minimum(corpus["deduction_80c"], 150000)))
+    return normal, normal + corpus["stcg"] + corpus["ltcg"]
+
+@pytest.mark.parametrize("region", range(len(REGIONS) - 1), ids=[name for name, _, _, _ in REGIONS[:-1]])
+def test_rows_land_on_their_breakpoint(region):
+    corpus = generate_corpus(100000, seed=7)
+    normal, total = _incomes(corpus)
+    _, _, point, on_total = REGIONS[region]
+    rows = corpus["region"] == region
+    income = (total if on_total else normal)[rows]
+    width = max(50000, point * 0.02)
+    assert np.mean(np.abs(income - point) <= width + 1) > 0.95
+
+def test_vectorized_engine_matches_tax_engine():
+    check_vectorized_engine(generate_corpus(20000, seed=11))
+
+def test_unchanged_engine_diffs_clean(tmp_path):
+    path = tmp_path / "golden.npz"
+    build_golden(path, 5000, seed=3)
+    result = diff(path)
+    assert result["rows"] == 5000 and result["changed"] == 0
+
+def test_engine_change_shows_in_vectorized_diff(tmp_path, monkeypatch):
+    path = tmp_path / "golden.npz"
+    build_golden(path, 5000, seed=3)
+    monkeypatch.setitem(tax_engine.REBATE, "new", (1200000, 50000))
+    regions = {region["region"]: region["changed"] for region in diff(path)["regions"]}
+    assert regions["New ₹12L rebate"] > 0
+    assert all(changed == 0 for name, changed in regions.items() if name.startswith("Old"))
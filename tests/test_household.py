@@ -0,0 +1,89 @@
+import itertools
+import random
+
+import pytest
+
+from household import INCOME_HEADS, member_liability, optimize_household
+from tax_engine import apply_deduction_caps
+
+def brute_force(members, items):
+    """Cheapest household liability over every possible allocation"""
+    names = [member["name"] for member in members]
+    best = None
+    for owners in itertools.product(*[item.get("eligible") or names for item in items]):
+        total = 0
+        for member in members:
+            totals = {head: member.get(head, 0) for head in INCOME_HEADS}
+            for item, owner in zip(items, owners):
+                if owner == member["name"]:
+                    for head, amount in item["income"].items():
+                        totals[head] += amount
+            deductions = apply_deduction_caps(member.get("deductions"))[1]
+            total += member_liability(*(totals[head] for head in INCOME_HEADS), deductions)[1]
+        best = total if best is None else min(best, total)
+    return round(best, 2)
+
+def random_household(rng):
+    members = [
+        {"name": f"M{i}", rng.choice(["salary", "business_income", "stcg"]): rng.choice([0, 50000, 300000, 1000000, 1100000])}
+        for i in range(rng.randint(2, 3))
+    ]
+    if rng.random() < 0.3:
+        members[0]["deductions"] = {"80C": 150000}
+    names = [member["name"] for member in members]
+    items = [
+        {
+            "name": f"Item {j}",
+            "income": {rng.choice(INCOME_HEADS): rng.choice([50000, 100000, 300000, 600000, 1000000, 30000000])},
+            "eligible": rng.sample(names, rng.randint(1, len(names))),
+        }
+        for j in range(rng.randint(1, 5))
+    ]
+    return members, items
+
+def test_matches_brute_force_on_random_households():
+    rng = random.Random(7)
+    for _ in range(1500):
+        members, items = random_household(rng)
+        result = optimize_household(members, items)
+        assert result["proven_optimal"]
+        assert result["total_liability"] == pytest.approx(brute_force(members, items), abs=0.01)
+
+def test_income_can_lower_liability_inside_marginal_relief_band():
+    # Business 50k + STCG 10L pays STCG tax; ₹3L of rent pulls total income into the
+    # ₹12L - ₹12.6L relief band, where tax is capped at the excess over ₹12L
+    members = [{"name": "A", "business_income": 50000, "stcg": 1000000}, {"name": "B", "salary": 3000000}]
+    items = [{"name": "Rental Flat", "income": {"house_income": 300000}}]
+    result = optimize_household(members, items)
+    assert result["allocation"] == {"Rental Flat": "A"}
+    assert result["total_liability"] == pytest.approx(brute_force(members, items), abs=0.01)
+
+def test_interchangeable_members_must_match_on_remaining_eligibility():
+    members = [{"name": "A"}, {"name": "B"}]
+    items = [
+        {"name": "FD", "income": {"other_sources": 900000}},
+        {"name": "Shares", "income": {"stcg": 900000}, "eligible": ["B"]},
+    ]
+    result = optimize_household(members, items)
+    assert result["total_liability"] == pytest.approx(brute_force(members, items), abs=0.01)
+
+def test_proves_a_five_member_household_with_24_items():
+    # Two salaried spouses, a retired parent, a business owner and an earning child,
+    # with FDs, rent and shares to spread between them
+    members = [
+        {"name": "Asha", "salary": 2400000, "deductions": {"80C": 150000}},
+        {"name": "Ravi", "salary": 1600000},
+        {"name": "Kamala", "other_sources": 300000},
+        {"name": "Gopal", "business_income": 2500000},
+        {"name": "Meera", "salary": 2000000},
+    ]
+    rng = random.Random(7)
+    heads = ["other_sources", "other_sources", "house_income", "ltcg", "ltcg", "stcg"]
+    items = [{"name": f"Item {j}", "income": {rng.choice(heads): rng.randrange(20000, 500000, 1000)}} for j in range(24)]
+    result = optimize_household(members, items)
+    assert result["proven_optimal"]
+    assert result["nodes_explored"] > 0
+
+def test_rejects_negative_item_income():
+    with pytest.raises(ValueError):
+        optimize_household([{"name": "A"}], [{"name": "Loss", "income": {"business_income": -1000}}])
@@ -0,0 +1,36 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+pytest.importorskip("streamlit")
+
+import lite_budget
+
+def test_lite_app_within_budget(tmp_path):
+    # Separate process: clean tracemalloc figures, and a throwaway shared result cache
+    env = {**os.environ, "APMH_RESULT_CACHE": str(tmp_path / "cache" / "results.sqlite3")}
+    run = subprocess.run([sys.executable, lite_budget.__file__], env=env, capture_output=True, text=True, timeout=600)
+    assert run.returncode == 0, run.stdout
+
+def test_legacy_entry_point_runs_the_lite_app():
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(os.path.join(lite_budget.HERE, "test123 calculator.py"), default_timeout=30).run()
+    assert not app.exception
+    assert any("Calculate Tax" in button.label for button in app.button)
+
+def test_full_app_session_memory_stays_reduced():
+    # Tables go to st.dataframe as plain dicts/lists - no per-session DataFrames
+    measured = lite_budget.measure_isolated(lite_budget.FULL_APP, reruns=1)
+    assert measured["session_bytes"] <= lite_budget.FULL_SESSION_MEMORY_CEILING
+
+def test_session_memory_report_splits_the_measured_figure():
+    from shared_assets import SHARED_ASSETS, deep_size, session_memory_report
+
+    state = {"last_result": {"total_tax": 1.0, "net_tax": 1.0}, "table": SHARED_ASSETS["DEMO_TABLE"]}
+    report = session_memory_report(state, 300000)
+    assert report["session_total"] == 300000
+    assert report["session_state"]["table"] == 0  # shared, counted once per process
+    assert report["other"] == 300000 - deep_size(state["last_result"])
@@ -0,0 +1,73 @@
+import random
+
+import pytest
+
+from portfolio import MARGINAL_RELIEF_BAND, RATE_BIN_WIDTH, RATE_BINS, PortfolioAggregates, load_result_set
+from result_store import BAND_EDGES, REGIMES, ResultSet, income_band, write_results
+from tax_engine import calculate_client
+
+def _random_client(rng):
+    return {
+        "regime": rng.choice(REGIMES),
+        "salary": rng.choice([0, rng.randrange(0, 3000000, 1000)]),
+        "business_income": rng.choice([0, 0, rng.randrange(1100000, 1300000, 500), rng.randrange(0, 80000000, 10000)]),
+        "stcg": rng.choice([0, rng.randrange(0, 300000, 1000)]),
+        "ltcg": rng.choice([0, rng.randrange(0, 600000, 1000)]),
+    }
+
+def _recompute(results):
+    """The snapshot built from scratch, straight from the results"""
+    expected = {
+        "clients": len(results),
+        "regime_counts": {regime: 0 for regime in REGIMES},
+        "rate_histogram": {regime: [0] * RATE_BINS for regime in REGIMES},
+        "band_counts": {regime: [0] * (len(BAND_EDGES) + 1) for regime in REGIMES},
+        "marginal_relief_band": {regime: 0 for regime in REGIMES},
+        "surcharge_clients": 0,
+        "totals": {name: 0.0 for name in ("total_taxable_income", "total_tax", "surcharge", "rebate_applied", "marginal_relief_applied")},
+    }
+    for result in results:
+        regime, income = result["regime"], result["total_taxable_income"]
+        rate = result["total_tax"] / income * 100 if income > 0 else 0.0
+        expected["regime_counts"][regime] += 1
+        expected["rate_histogram"][regime][min(int(rate // RATE_BIN_WIDTH), RATE_BINS - 1)] += 1
+        expected["band_counts"][regime][income_band(income)] += 1
+        expected["marginal_relief_band"][regime] += MARGINAL_RELIEF_BAND[0] < income <= MARGINAL_RELIEF_BAND[1]
+        expected["surcharge_clients"] += result["surcharge"] > 0
+        for name in expected["totals"]:
+            expected["totals"][name] += result[name]
+    return expected
+
+def _assert_snapshot(aggregates, results):
+    snapshot, expected = aggregates.snapshot(), _recompute(results)
+    for name, totals in expected.pop("totals").items():
+        assert snapshot["totals"][name] == pytest.approx(totals, abs=0.01)
+    assert {name: snapshot[name] for name in expected} == expected
+
+def test_random_upserts_and_removes_match_a_recompute():
+    rng = random.Random(4)
+    aggregates, book = PortfolioAggregates(), {}
+    for _ in range(3000):
+        client_id = f"c{rng.randrange(400)}"
+        if rng.random() < 0.2:
+            aggregates.remove(client_id)
+            book.pop(client_id, None)
+        else:
+            book[client_id] = calculate_client(_random_client(rng))
+            aggregates.upsert(client_id, book[client_id])
+    assert len(aggregates) == len(book) and all(client_id in aggregates for client_id in book)
+    _assert_snapshot(aggregates, book.values())
+
+def test_reloading_a_result_file_does_not_double_count(tmp_path):
+    rng = random.Random(8)
+    clients = [_random_client(rng) for _ in range(300)]
+    path = str(tmp_path / "batch.apmh")
+    write_results(path, clients)
+    manual = calculate_client(_random_client(rng))
+
+    aggregates = PortfolioAggregates()
+    aggregates.upsert("walk-in", manual)
+    for _ in range(2):
+        with ResultSet(path) as result_set:
+            load_result_set(result_set, aggregates, id_prefix=path)
+    _assert_snapshot(aggregates, [calculate_client(client) for client in clients] + [manual])
@@ -0,0 +1,72 @@
+import csv
+import os
+
+import pytest
+
+from report_generator import client_inputs, generate_reports
+from results_tables import results_tables
+from tax_engine import calculate_client
+
+@pytest.mark.parametrize("record", [
+    {"regime": 1},
+    {"regime": "mixed"},
+    {"deductions": [1, 2]},
+    {"deductions": {"80C": "x"}},
+    {"salary": [5]},
+    ["not", "an", "object"],
+])
+def test_malformed_records_raise_value_error(record):
+    with pytest.raises(ValueError):
+        client_inputs(record)
+
+def test_bad_clients_and_clashing_ids_do_not_stop_or_overwrite(tmp_path):
+    clients = [
+        {"client_id": "a/b", "regime": "new", "salary": 900000},
+        {"client_id": "a_b", "regime": "old", "salary": 900000},
+        {"client_id": "a_b", "regime": "old", "salary": 100},
+        {"client_id": "bad", "regime": 1},
+        "{not json",
+    ]
+    results = list(generate_reports(clients, str(tmp_path), workers=1))
+    summaries, throughput = results[:-1], results[-1]["throughput"]
+    assert throughput["pages"] == 3 and throughput["errors"] == 2
+
+    reports = [summary["report"] for summary in summaries if "report" in summary]
+    assert len(set(reports)) == 3
+    assert all(os.path.exists(report) and os.path.exists(report[:-5] + ".csv") for report in reports)
+    with open(reports[1].replace(".html", ".csv"), encoding="utf-8") as appendix:
+        assert ["Total Tax", "85,800.00", "100%"] in list(csv.reader(appendix))
+
+def _tables(record):
+    inputs = client_inputs(record)
+    return results_tables(inputs, calculate_client(inputs))
+
+def test_reliefs_listed_just_before_total_tax():
+    _, _, _, rows = _tables({"regime": "new", "salary": 1300000})[-1]
+    assert [row[0] for row in rows] == ["Base Tax", "Surcharge", "Cess", "Less: Marginal Relief",
+                                        "Total Tax", "TDS Paid", "Net Amount"]
+
+def test_no_marginal_relief_note_above_band(tmp_path):
+    notes = {title: notes for title, notes, _, _ in _tables({"regime": "new", "salary": 1500000})}
+    assert ("warning", "Income > ₹12.6L: No marginal relief applicable") in notes["New Regime - Detailed Calculation Breakdown"]
+
+    summary = next(generate_reports([{"regime": "new", "salary": 1500000}], str(tmp_path), workers=1))
+    with open(summary["report"], encoding="utf-8") as page:
+        assert "Income &gt; ₹12.6L: No marginal relief applicable" in page.read()
+
+def test_app_page_shows_the_report_tables(tmp_path, monkeypatch):
+    pytest.importorskip("streamlit")
+    from streamlit.testing.v1 import AppTest
+
+    monkeypatch.setenv("APMH_RESULT_CACHE", str(tmp_path / "cache" / "results.sqlite3"))
+    app = AppTest.from_file(os.path.join(os.path.dirname(__file__), "..", "APMH Tax Calculator.py"), default_timeout=60).run()
+    app.radio[0].set_value("new")
+    app.number_input(key="salary").set_value(1250000)
+    app.number_input(key="house_income").set_value(100000)
+    next(button for button in app.button if "Calculate Tax" in button.label).click()
+    app.run()
+    assert not app.exception
+
+    tables = _tables({"regime": "new", "salary": 1250000, "house_income": 100000})
+    shown = [frame.value.values.tolist() for frame in app.dataframe[:len(tables)]]
+    assert shown == [rows for _, _, _, rows in tables]
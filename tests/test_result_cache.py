@@ -0,0 +1,83 @@
+import os
+import stat
+
+import pytest
+
+import calc_graph
+import result_cache
+from result_cache import SharedResultCache
+
+def test_store_is_private_to_the_user(tmp_path):
+    path = tmp_path / "apmh" / "cache.sqlite3"
+    SharedResultCache(str(path)).close()
+    assert stat.S_IMODE(os.stat(path.parent).st_mode) == 0o700
+    assert stat.S_IMODE(os.stat(path).st_mode) & 0o077 == 0
+
+@pytest.mark.skipif(not hasattr(os, "getuid"), reason="POSIX permissions")
+def test_refuses_a_directory_others_can_write(tmp_path):
+    shared = tmp_path / "shared"
+    shared.mkdir()
+    shared.chmod(0o777)
+    with pytest.raises(PermissionError):
+        SharedResultCache(str(shared / "cache.sqlite3"))
+
+def test_rule_set_versions_do_not_clobber_each_other(tmp_path, monkeypatch):
+    path = str(tmp_path / "cache.sqlite3")
+    current = SharedResultCache(path)
+    current.put("client", {"salary": 1}, {"total_tax": 1})
+
+    monkeypatch.setattr(result_cache, "RULESET_VERSION", "next-release")
+    upgraded = SharedResultCache(path)
+    assert upgraded.get("client", {"salary": 1}) is None
+    upgraded.put("client", {"salary": 1}, {"total_tax": 2})
+    assert upgraded.get("client", {"salary": 1}) == {"total_tax": 2}
+
+    monkeypatch.undo()
+    assert current.get("client", {"salary": 1}) == {"total_tax": 1}
+
+def test_lookups_do_not_write(tmp_path):
+    cache = SharedResultCache(str(tmp_path / "cache.sqlite3"))
+    cache.put("client", {"salary": 1}, {"total_tax": 1})
+    cache.metrics()  # flush anything pending
+    writes = cache._db.total_changes
+    for _ in range(50):
+        assert cache.get("client", {"salary": 1}) == {"total_tax": 1}
+    assert cache._db.total_changes == writes
+    cache.metrics()
+    assert cache._db.total_changes > writes
+
+def test_recently_read_entries_survive_eviction(tmp_path):
+    cache = SharedResultCache(str(tmp_path / "cache.sqlite3"), max_entries=100)
+    cache.put("client", {"id": "hot"}, 1)
+    for i in range(99):
+        cache.put("client", {"id": i}, i)
+    # Oldest entry, but read since - its pending access time must count at eviction
+    assert cache.get("client", {"id": "hot"}) == 1
+    cache.put("client", {"id": "overflow"}, 0)
+    assert cache.get("client", {"id": "hot"}) == 1
+    assert cache.get("client", {"id": 0}) is None
+
+def test_equivalent_inputs_share_one_entry_and_tds_only_moves_net_tax(tmp_path):
+    cache = SharedResultCache(str(tmp_path / "cache.sqlite3"))
+    calls = []
+
+    def compute(inputs):
+        calls.append(inputs)
+        return result_cache.calculate_client(inputs)
+
+    first = cache.calculate({"regime": "new", "salary": 1500000, "tds_paid": 10000, "deductions": {"80C": 150000}}, compute)
+    # Same client from the lite form: floats, every field present, no deductions
+    second = cache.calculate({**calc_graph.INPUTS, "salary": 1500000.0, "tds_paid": 25000.0}, compute)
+    assert len(calls) == 1 and calls[0] == result_cache.client_inputs({"salary": 1500000})
+    assert second["total_tax"] == first["total_tax"] == result_cache.calculate_client({"salary": 1500000})["total_tax"]
+    assert (first["net_tax"], second["net_tax"]) == (first["total_tax"] - 10000, first["total_tax"] - 25000)
+
+    cache.calculate({"regime": "old", "salary": 1500000, "deductions": {"80C": 150000}}, compute)
+    assert len(calls) == 2  # deductions do count under the old regime
+
+def test_full_app_graph_results_match_the_engine(tmp_path):
+    client = {"regime": "new", "salary": 1180000.0, "ltcg": 60000.0, "tds_paid": 5000.0}
+    graph = calc_graph.build_tax_graph(**client)
+    from_graph = SharedResultCache(str(tmp_path / "a.sqlite3")).calculate(
+        client, compute=lambda inputs: calc_graph.client_result(graph.evaluate()))
+    assert from_graph == SharedResultCache(str(tmp_path / "b.sqlite3")).calculate(client)
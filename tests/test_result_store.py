@@ -0,0 +1,67 @@
+import random
+
+import pytest
+
+import result_store
+from result_store import COLUMNS, REGIMES, ResultSet, income_band, write_results
+
+def _clients(count, seed=11):
+    rng = random.Random(seed)
+    return [{
+        "regime": rng.choice(REGIMES),
+        "salary": rng.choice([0, rng.randrange(0, 6000000, 1000)]),
+        "business_income": rng.choice([0, rng.randrange(0, 60000000, 5000)]),
+        "other_sources": rng.randrange(0, 300000, 500),
+        "stcg": rng.choice([0, rng.randrange(0, 500000, 1000)]),
+        "ltcg": rng.choice([0, rng.randrange(0, 800000, 1000)]),
+    } for _ in range(count)]
+
+@pytest.fixture
+def results(tmp_path, monkeypatch):
+    # A flush every few rows puts group boundaries mid-spill and leaves a partial tail
+    monkeypatch.setattr(result_store, "FLUSH_ROWS", 7)
+    clients = _clients(500)
+    path = str(tmp_path / "results.apmh")
+    assert write_results(path, clients) == len(clients)
+    return path, [result_store.calculate_client(client) for client in clients]
+
+def test_round_trip_columns_index_and_aggregates(results):
+    path, expected = results
+    with ResultSet(path) as stored:
+        assert stored.rows == len(expected)
+        for name, _ in COLUMNS:
+            values = [REGIMES.index(row["regime"]) if name == "regime" else float(row[name]) for row in expected]
+            assert stored.column(name).tolist() == values
+            assert stored.array(name).tolist() == values
+
+        groups = {}
+        for row_id, row in enumerate(expected):
+            groups.setdefault((row["regime"], income_band(row["total_taxable_income"])), []).append(row_id)
+        for (regime, band), row_ids in groups.items():
+            assert [list(view) for view in stored.row_ids(regime, band)] == [row_ids]
+            rows = [expected[row_id]["net_tax"] for row_id in row_ids]
+            aggregate = stored.aggregate("net_tax", regime, band)
+            assert aggregate["count"] == len(rows)
+            assert aggregate["sum"] == pytest.approx(sum(rows))
+            assert (aggregate["min"], aggregate["max"]) == (min(rows), max(rows))
+        assert sorted(row for view in stored.row_ids() for row in view) == list(range(len(expected)))
+
+        for regime in REGIMES:
+            rows = [row["total_tax"] for row in expected if row["regime"] == regime]
+            assert stored.aggregate("total_tax", regime)["sum"] == pytest.approx(sum(rows))
+
+def test_views_outlive_close(results):
+    path, expected = results
+    with ResultSet(path) as stored:
+        taxes = stored.array("total_tax")
+        regimes = stored.column("regime")
+        row_ids = stored.row_ids("new")
+    assert taxes.tolist() == [row["total_tax"] for row in expected]
+    assert regimes[0] == REGIMES.index(expected[0]["regime"])
+    assert sum(len(view) for view in row_ids) == sum(row["regime"] == "new" for row in expected)
+
+def test_rejects_files_from_another_byte_order(results, monkeypatch):
+    path, _ = results
+    monkeypatch.setattr(result_store.sys, "byteorder", "big" if result_store.sys.byteorder == "little" else "little")
+    with pytest.raises(ValueError):
+        ResultSet(path)
@@ -0,0 +1,84 @@
+import io
+import json
+
+import pytest
+
+import statement_import
+from statement_import import import_statement
+
+def _import(text, name="statement"):
+    return import_statement(io.BytesIO(text.encode()), name)
+
+@pytest.fixture(params=[7, 64 * 1024])
+def chunk_size(request, monkeypatch):
+    # Tiny chunks split keys, values and entries across refills
+    monkeypatch.setattr(statement_import, "CHUNK_SIZE", request.param)
+
+def test_json_entries_are_found_by_key_not_by_first_array(chunk_size):
+    statement = {
+        "header": {"assessees": [{"pan": "ABCDE1234F", "amount": 5}], "version": 2},
+        "entries": [
+            {"section": "192", "amount": "10,00,000", "tds": 50000, "deductor name": "Acme"},
+            {"section": "194A", "amount": 20000, "tds": 2000},
+        ],
+    }
+    inputs = _import(json.dumps(statement)).calculator_inputs()
+    assert inputs["salary"] == 1000000 and inputs["other_sources"] == 20000 and inputs["tds_paid"] == 52000
+
+def test_top_level_list(chunk_size):
+    assert _import('[{"section": "192", "amount": 100}]').entries == 1
+
+@pytest.mark.parametrize("text", [
+    '{"header": {"assessees": [{"pan": "X"}]}}',
+    '{"entries": []}',
+    "Sr. No.^Section^Amount Paid / Credited\n",
+])
+def test_statement_without_entries_is_an_error(text):
+    with pytest.raises(ValueError):
+        _import(text)
+
+def test_26as_text_carries_deductor_into_its_transactions(chunk_size):
+    text = "\n".join([
+        "Sr. No.^Name of Deductor^TAN of Deductor^Total Amount Paid / Credited^Total Tax Deducted",
+        "1^ACME LTD^MUMA12345B^900000.00^90000.00",
+        "Sr. No.^Section^Transaction Date^Amount Paid / Credited^Tax Deducted",
+        "1^192^31-Mar-2025^600000.00^60000.00",
+        "2^192^28-Feb-2025^300000.00^30000.00",
+        "Sr. No.^Name of Deductor^TAN of Deductor^Total Amount Paid / Credited^Total Tax Deducted",
+        "2^STATE BANK^DELS99999C^20000.00^2000.00",
+        "Sr. No.^Section^Transaction Date^Amount Paid / Credited^Tax Deducted",
+        "1^194A^31-Mar-2025^20000.00^2000.00",
+    ])
+    summary = _import(text).summary()
+    assert summary["entries"] == 3
+    assert summary["by_deductor"] == {
+        "MUMA12345B ACME LTD": {"amount": 900000.0, "tds": 90000.0, "head": "salary"},
+        "DELS99999C STATE BANK": {"amount": 20000.0, "tds": 2000.0, "head": "other_sources"},
+    }
+
+def test_26as_parts_start_fresh_headers_and_deductors(chunk_size):
+    text = "\n".join([
+        "PART-A - Details of Tax Deducted at Source",
+        "Sr. No.^Name of Deductor^TAN of Deductor^Total Amount Paid / Credited^Total Tax Deducted",
+        "1^ACME LTD^MUMA12345B^600000.00^60000.00",
+        "Sr. No.^Section^Transaction Date^Amount Paid / Credited^Tax Deducted",
+        "1^192^31-Mar-2025^600000.00^60000.00",
+        "PART-B - Details of Tax Collected at Source",
+        "No Transactions Present",
+        "PART-C - Details of Tax Paid (other than TDS or TCS)",
+        "Sr. No.^Major Head^Minor Head^Tax^Surcharge^Education Cess^Others^Total Tax^BSR Code^Date of Deposit^Challan Serial Number",
+        "1^0021^100^50000.00^0.00^0.00^0.00^50000.00^0510308^15-Mar-2025^12345",
+        "PART-D - Details of Paid Refund",
+        "Sr. No.^Assessment Year^Mode^Refund Issued^Nature of Refund^Amount of Refund^Interest^Date of Payment",
+        "1^2024-25^ECS^A^-^12000.00^300.00^01-Oct-2024",
+    ])
+    summary = _import(text).summary()
+    assert summary["entries"] == 2
+    assert summary["inputs"]["salary"] == 600000 and summary["inputs"]["tds_paid"] == 110000
+    assert summary["by_deductor"]["MUMA12345B ACME LTD"] == {"amount": 600000.0, "tds": 60000.0, "head": "salary"}
+    assert summary["by_head"]["unclassified"] == {"amount": 0.0, "tds": 50000.0}
+
+def test_unparseable_amounts_are_skipped_not_zeroed():
+    aggregate = _import("Section^Amount Paid / Credited^Tax Deducted\n192^Tax^1000\n192^500000^50000\n")
+    assert aggregate.entries == 1 and aggregate.skipped == 1
+    assert aggregate.calculator_inputs()["tds_paid"] == 50000